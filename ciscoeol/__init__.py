@@ -0,0 +1,31 @@
+from .cache import classEOXCache
+from .checkpoint import classCheckpoint
+from .ciscosupport import classBatchPlanner,classCiscoSupport
+from .config import classSetting,load_env
+from .filters import classFilter
+from .inventory import classInventory
+from .metrics import classMetrics
+from .netbrain import classNetbrain
+from .pipeline import classPipeline
+from .report import classReport
+from .sharded import classShardedRun
+from .transport import classRateLimiter,classToken,classTransport
+
+__all__ = [
+    "classBatchPlanner",
+    "classCheckpoint",
+    "classCiscoSupport",
+    "classEOXCache",
+    "classFilter",
+    "classInventory",
+    "classMetrics",
+    "classNetbrain",
+    "classPipeline",
+    "classRateLimiter",
+    "classReport",
+    "classSetting",
+    "classShardedRun",
+    "classToken",
+    "classTransport",
+    "load_env",
+]
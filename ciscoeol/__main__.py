@@ -0,0 +1,5 @@
+from .cli import main
+
+#Begin the Work
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/python
+"""
+Benchmarks each stage of the EOL check against mockserver.py:
+    inventory - device pages and module attributes streamed from NetBrain, then sorted by name
+    eox - serial extraction, EOX lookups and the report
+    upload - EOL attributes uploaded back to NetBrain
+    pipeline - the three stages run at the same time (--pipeline), on a fresh mock server
+    extract - serial extraction of iter_serials() against the dataframe version get_serial_table() it replaced (--extract).
+              No mock server is needed, about 4.6 modules per device, so 22000 devices is a 100k module inventory
+The mock server runs in its own process so it doesn't compete with the script for the GIL.
+Wall time, requests per second served by the mock and peak Python memory (tracemalloc) are reported per stage.
+
+    python -m ciscoeol.benchmark --sizes 1000,10000,100000 --latency 0.02
+"""
+
+import argparse,contextlib,io,json,multiprocessing,os,shutil,sys,tempfile,time,tracemalloc
+import requests
+from . import cli,mockserver
+from .ciscosupport import classCiscoSupport
+
+def serve(conn, port, options):
+    """
+    Runs a mock server until anything is sent on conn.  Runs in a child process.
+    """
+    server = mockserver.start(address=("127.0.0.1", port), **options)
+    conn.send(server.server_address[1])
+    conn.recv()
+    server.shutdown()
+    server.server_close()
+
+def get_stats(url):
+    """
+    Outputs:
+        - request and byte counts served by the mock so far
+    """
+    return (requests.get(url + "/_stats").json())
+
+def measure(name, url, function, verbose=False):
+    """
+    Runs one stage and measures it.
+    Outputs:
+        - (result of function, dictionary of measurements)
+    """
+    before = get_stats(url)
+    tracemalloc.reset_peak()
+    output = io.StringIO()
+    start = time.perf_counter()
+    #the stages print progress and the report, keep it out of the benchmark output unless asked for
+    with contextlib.redirect_stdout(sys.stdout if verbose else output):
+        result = function()
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    after = get_stats(url)
+    count = after["requests"] - before["requests"]
+    errors = sum(value for key, value in after["statuses"].items() if key != "200") - \
+        sum(value for key, value in before["statuses"].items() if key != "200")
+    return ((result, {
+        "stage": name,
+        "seconds": round(wall, 3),
+        "requests": count,
+        "errors": errors,
+        "requests_per_second": round(count / wall, 1) if wall else 0.0,
+        "megabytes": round((after["bytes"] - before["bytes"]) / 1e6, 2),
+        "peak_mb": round(peak / 1e6, 2),
+    }))
+
+def run_size(devices, port, options, workdir, verbose=False, pipeline=False):
+    """
+    Runs every stage, or the whole pipeline, for one fleet size on a fresh mock server.
+    Outputs:
+        - list of measurements, one per stage
+    """
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe()
+    process = context.Process(target=serve, args=(child, port, dict(options, devices=devices)), daemon=True)
+    process.start()
+    parent.recv()
+    url = "http://127.0.0.1:%d" % port
+
+    inventoryfilename = os.path.join(workdir, "inventory-%d.jsonl" % devices)
+    results = []
+    #the stages of the command line, without a checkpoint
+    stageoptions = argparse.Namespace(inventory=inventoryfilename, pipeline=True)
+    stages = (("pipeline", cli.run),) if pipeline else (("inventory", cli.fetch_inventory), ("eox", cli.lookup_eol), ("upload", cli.upload))
+    try:
+        for name, stage in stages:
+            result, measurement = measure(name, url, lambda: stage(stageoptions, None), verbose)
+            if result:
+                raise RuntimeError(result)
+            measurement["devices"] = devices
+            results.append(measurement)
+            print (format_row(measurement), flush=True)
+    finally:
+        parent.send("stop")
+        process.join()
+    return (results)
+
+def get_extract_devices(devices, seed):
+    """
+    Outputs:
+        - devices of a mock fleet with their modules, and a device with every kind of serial cell that is cleaned up
+    """
+    fleet = mockserver.classMockFleet(devices, seed)
+    result = []
+    for index in range(devices):
+        device = fleet.get_device(index, fullattr=False)
+        device["attributes"] = fleet.get_modules(index)
+        result.append(device)
+    result.append({"name": "edge", "sn": " foc1 , ,MAC: 0011,N/A", "model": "ws c1", "attributes": {
+        "Missing": {"name": "Missing", "sn": None, "type": None},
+        "Number": {"name": "Number", "sn": 12345, "type": "X"},
+        "Label": {"name": "Label", "sn": "serial: abc, lit 9 ", "type": "y z"},
+        "Blank": {"name": "Blank", "sn": " ", "type": ""},
+        "Chassis": {"name": "Chassis", "sn": " foc1 , ,MAC: 0011,N/A", "type": ""},
+        "Pair": {"name": "Pair", "sn": "x,,y", "type": "Q"},
+    }})
+    return (result)
+
+def get_serial_table(devices):
+    """
+    Extracts the device and module serials the way get_eol() did before classCiscoSupport.iter_serials(), with a
+    pandas dataframe.  Kept as the reference iter_serials() is checked and timed against.
+    Inputs:
+        - devices - iterable of device dictionaries
+    Outputs:
+        - df - dataframe of serial, hostname, modulename, product ID with the columns 0, 1, 2, 3
+    """
+    import pandas as pd
+    #create a blank list to store variable information
+    serialList = []
+
+    #loop through the devices of the inventory one at a time
+    for i in devices:
+        #extract the variables desired
+        devicesn = i['sn']
+        devicename = i['name']
+        #append the serial number to serialList
+        serialList.append([devicesn,devicename,"",i.get('model') or ""])
+
+        if "attributes" in i:
+            #loop through the 'attributes' and extract values
+            for x in i['attributes'].values():
+                sn = x['sn']
+                modulename = x['name']
+                #if serialnumber is blank or N/A continue without action
+                if str(sn) == "" or "N/A" in str(sn):
+                    continue
+                #if the device serial number matches the module serial then don't append it
+                if devicesn != sn:
+                    #append the module serial number and hostname to serials
+                    serialList.append([sn,devicename,modulename,x.get('type') or ""])
+
+    #convert the list of serials to a pandas dataframe.  A page can hold no devices at all
+    df = pd.DataFrame(serialList, columns=[0, 1, 2, 3])
+    #if there are multiple comma-separated strings per cell, split them and put them on their own line
+    df[0] = df[0].str.split(',')
+    df = df.explode(0).reset_index(drop=True)
+    # Drop lines containing "Serial:" or "MAC:"
+    df = df[~df[0].str.contains('Serial:|MAC:', case=False, na=False)]
+    #drop blanks in the serial number first column only, a serial of only whitespace is blank too
+    df = df.replace('', pd.NA).dropna(subset=[df.columns[0]])
+    df = df[df[0].str.strip() != ""]
+    #the device rows have a blank modulename, and a device or module can have no product ID
+    df = df.fillna("")
+    return (df)
+
+def measure_extraction(devices, seed):
+    """
+    Extracts the serials of one fleet size both ways and checks they are the same.
+    Outputs:
+        - dictionary of measurements
+    """
+    inventory = get_extract_devices(devices, seed)
+    start = time.perf_counter()
+    df = get_serial_table(inventory)
+    #the generated devices carry no domain
+    table = [(classCiscoSupport.normalize_serial(serial), hostname, modulename, classCiscoSupport.normalize_serial(pid), "")
+        for serial, hostname, modulename, pid in df.itertuples(index=False)]
+    tableseconds = time.perf_counter() - start
+    start = time.perf_counter()
+    serials = list(classCiscoSupport.iter_serials(inventory))
+    seconds = time.perf_counter() - start
+    return ({
+        "stage": "extract",
+        "devices": devices,
+        "modules": sum(len(i["attributes"]) for i in inventory),
+        "serials": len(serials),
+        "dataframe_seconds": round(tableseconds, 3),
+        "seconds": round(seconds, 3),
+        "speedup": round(tableseconds / seconds, 1) if seconds else 0.0,
+        "same": serials == table,
+    })
+
+def format_row(measurement):
+    return ("%9d  %-9s %9.2f %9d %7d %12.1f %9.2f %9.2f" % (measurement["devices"], measurement["stage"],
+        measurement["seconds"], measurement["requests"], measurement["errors"], measurement["requests_per_second"],
+        measurement["megabytes"], measurement["peak_mb"]))
+
+def get_options(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the EOL check stages against the mock server")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated fleet sizes")
+    parser.add_argument("--port", type=int, default=18080, help="port of the mock server")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock adds to every call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra seconds the mock adds to every call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of data calls answered with 503")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of EOX calls answered with 429")
+    parser.add_argument("--token-lifetime", type=int, default=3600, help="seconds a mock token is accepted")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pipeline", action="store_true", help="also measure the stages run as a pipeline")
+    parser.add_argument("--extract", action="store_true", help="only compare the serial extraction, without the mock server")
+    parser.add_argument("--json", help="also write the measurements to this json file")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the stages")
+    return (parser.parse_args(argv))
+
+#Begin the Work
+if __name__ == "__main__":
+    options = get_options()
+    if options.extract:
+        #pandas is imported before anything is timed
+        get_serial_table([])
+        print ("%9s %9s %9s %12s %9s %8s %5s" % ("devices", "modules", "serials", "dataframe s", "single s", "speedup", "same"))
+        measurements = []
+        for size in options.sizes.split(","):
+            measurement = measure_extraction(int(size), options.seed)
+            print ("%9d %9d %9d %12.3f %9.3f %7.1fx %5s" % (measurement["devices"], measurement["modules"], measurement["serials"],
+                measurement["dataframe_seconds"], measurement["seconds"], measurement["speedup"], measurement["same"]), flush=True)
+            measurements.append(measurement)
+        if options.json:
+            with open(options.json, 'w') as file:
+                json.dump(measurements, file, indent=4)
+        raise SystemExit(0 if all(i["same"] for i in measurements) else 1)
+    workdir = tempfile.mkdtemp(prefix="ciscoeol-benchmark-")
+    url = "http://127.0.0.1:%d" % options.port
+
+    #point the settings at the mock.  These are set even if a .env file exists so every run measures the same thing
+    os.environ.update({
+        "NETBRAIN_BASE_URL": url + mockserver.classMockServer.netbrain_path,
+        "CISCOEOL_BASE_URL": url + mockserver.classMockServer.eox_path,
+        "CISCOEOL_TOKEN_URL": url + mockserver.classMockServer.token_path,
+        "NETBRAIN_USER": "benchmark",
+        "NETBRAIN_PASSWORD": "benchmark",
+        "NETBRAIN_AUTHENTICATION_ID": "",
+        "NETBRAIN_TENANT": "tenant",
+        "NETBRAIN_DOMAIN": "domain",
+        "NETBRAIN_INVENTORY_SNAPSHOT": "",
+        "NETBRAIN_DOMAINS": "",
+        "NETBRAIN_SHARDS": "",
+        "CISCOEOL_PIPELINE": "",
+        "CISCOEOL_USER": "benchmark",
+        "CISCOEOL_PASSWORD": "benchmark",
+        "CISCOEOL_SERIALS": "",
+        "CISCOEOL_REPORT": os.path.join(workdir, "eolreport.csv"),
+        "CISCOEOL_REPORT_CSV": "",
+        "CISCOEOL_CACHE": "",
+        "CISCOEOL_CHECKPOINT": "",
+    })
+    #the client throughput is measured, not the production API quota.  Both can still be set in the environment
+    os.environ.setdefault("CISCOEOL_RATE_PER_SECOND", "1000")
+    os.environ.setdefault("CISCOEOL_RATE_PER_DAY", "0")
+    os.environ.setdefault("HTTP_BACKOFF", "0.05")
+
+    serveroptions = {"latency": options.latency, "jitter": options.jitter, "error_rate": options.error_rate,
+        "rate_429": options.rate_429, "token_lifetime": options.token_lifetime, "seed": options.seed}
+    print ("%9s  %-9s %9s %9s %7s %12s %9s %9s" % ("devices", "stage", "seconds", "requests", "errors", "requests/s", "MB", "peak MB"))
+    tracemalloc.start()
+    measurements = []
+    try:
+        for size in options.sizes.split(","):
+            measurements.extend(run_size(int(size), options.port, serveroptions, workdir, options.verbose))
+            #the upload changed the EOL values of the mock, so the pipeline gets a fresh one
+            if options.pipeline:
+                measurements.extend(run_size(int(size), options.port, serveroptions, workdir, options.verbose, pipeline=True))
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+    if options.json:
+        with open(options.json, 'w') as file:
+            json.dump(measurements, file, indent=4)
@@ -0,0 +1,76 @@
+import os,sqlite3,threading,time
+from .config import classSetting
+
+class classEOXCache():
+    """
+    This class keeps parsed EOX results by serial, and by product ID for the PID lookup, in a local SQLite database.
+    Each result expires after a TTL that depends on the outcome, so dates that are already announced
+    are kept much longer than "Not Announced" or not found answers.
+    """
+
+    #time to live in days for each outcome returned by parse_eox_records
+    ttl_announced = classSetting('CISCOEOL_CACHE_TTL_ANNOUNCED', 30.0, float)
+    ttl_notannounced = classSetting('CISCOEOL_CACHE_TTL_NOTANNOUNCED', 7.0, float)
+    ttl_notfound = classSetting('CISCOEOL_CACHE_TTL_NOTFOUND', 1.0, float)
+    #eox holds answers by serial, pid answers by product ID.  Both have the same columns
+    tables = ("eox", "pid")
+
+    def __init__(self, cachefilename):
+        """
+        Opens (and creates if needed) the cache database.
+        Inputs:
+            - cachefilename - path of the SQLite file
+        """
+        cachefilename = os.path.expanduser(cachefilename)
+        if os.path.dirname(cachefilename):
+            os.makedirs(os.path.dirname(cachefilename), exist_ok=True)
+        #the connection is shared by worker threads, so every access goes through the lock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(cachefilename, check_same_thread=False)
+        with self.lock, self.db:
+            for table in self.tables:
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS %s ("
+                    "serial TEXT PRIMARY KEY, status TEXT NOT NULL, eoldate TEXT, expires REAL NOT NULL)" % table
+                )
+
+    def get_many(self, serials, table="eox"):
+        """
+        Looks up serials that have not expired.
+        Inputs:
+            - serials - list of serial numbers
+            - table - eox, or pid to look up product IDs
+        Outputs:
+            - result - dictionary of serial: (status, eoldate) for every cached serial
+        """
+        result = {}
+        serials = list(serials)
+        now = time.time()
+        with self.lock:
+            #stay well below the SQLite host parameter limit
+            for start in range(0, len(serials), 500):
+                part = serials[start:start + 500]
+                rows = self.db.execute(
+                    "SELECT serial, status, eoldate FROM %s WHERE expires > ? AND serial IN (%s)" % (table, ",".join("?" * len(part))),
+                    [now] + part,
+                )
+                for serial, status, eoldate in rows:
+                    result[serial] = (status, eoldate)
+        return (result)
+
+    def put_many(self, outcomes, table="eox"):
+        """
+        Stores parsed results with the TTL of their outcome.
+        Inputs:
+            - outcomes - dictionary of serial: (status, eoldate)
+            - table - eox, or pid to store product IDs
+        """
+        now = time.time()
+        ttl = {status: getattr(self, 'ttl_' + status) * 86400 for status in ("announced", "notannounced", "notfound")}
+        rows = [(serial, status, eoldate, now + ttl[status]) for serial, (status, eoldate) in outcomes.items()]
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO %s (serial, status, eoldate, expires) VALUES (?, ?, ?, ?)" % table, rows)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,116 @@
+import json,os,threading,time
+from .config import classSetting
+from .console import Fore
+
+class classCheckpoint():
+    """
+    This class is a journal of the units of work a run has completed: device pages, EOX batches and uploads.
+    Every unit is appended as one json line and flushed, so an interrupted run can be started again and
+    resume at the first unfinished unit.  Without a filename nothing is recorded.
+    The journal records when its run started, and a journal older than max_age is from an earlier run that was never
+    finished, so it is discarded instead of resumed.
+    """
+
+    #set the journal location from environment variable file
+    checkpointfilename = classSetting('CISCOEOL_CHECKPOINT')
+    #hours a journal is resumed.  Keep it below the schedule of the job so one night never resumes the one before, 0 to always resume
+    max_age = classSetting('CISCOEOL_CHECKPOINT_MAX_AGE', 20.0, float)
+    #stages in run order.  The later stages are built on the earlier ones
+    stages = ("inventory", "eox", "upload")
+
+    def __init__(self, filename=None):
+        """
+        Loads the journal of a previous unfinished run, if there is one.
+        Inputs:
+            - filename - journal file (defaults to CISCOEOL_CHECKPOINT)
+        """
+        if filename is None:
+            filename = self.checkpointfilename
+        self.filename = os.path.expanduser(filename) if filename else None
+        self.lock = threading.Lock()
+        self.done = {}
+        if self.filename and os.path.isfile(self.filename):
+            with open(self.filename, 'r+b') as file:
+                #byte offset after the last complete line
+                offset = 0
+                for line in file:
+                    #a line cut short by a crash is the unit that did not finish
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    self.done.setdefault(entry['stage'], {})[entry['key']] = entry['data']
+                    offset = offset + len(line)
+                #cut the unfinished line off, otherwise the next record would be appended to it and lost too
+                file.truncate(offset)
+            started = self.done.get('run', {}).get('started')
+            if started and self.max_age and time.time() - started > self.max_age * 3600:
+                print (f'{Fore.YELLOW}Discarding checkpoint {self.filename} of a run started {(time.time() - started) / 3600:.1f} hours ago{Fore.RESET}')
+                self.done = {}
+                os.remove(self.filename)
+            else:
+                print (f'{Fore.YELLOW}Resuming from checkpoint {self.filename}{Fore.RESET}')
+
+    def completed(self, stage):
+        """
+        Outputs:
+            - dictionary of key: data for every unit of the stage that was completed
+        """
+        return (self.done.get(stage, {}))
+
+    def record(self, stage, key, data=None):
+        """
+        Records a completed unit of work.  Safe to call from worker threads.
+        Inputs:
+            - stage - inventory, eox or upload
+            - key - identifies the unit within the stage
+            - data - json serializable result needed to resume
+        """
+        with self.lock:
+            entries = [(stage, key, data)]
+            #the first unit of a run also records when the run started
+            if 'run' not in self.done:
+                entries.insert(0, ('run', 'started', time.time()))
+            for name, unit, value in entries:
+                self.done.setdefault(name, {})[unit] = value
+            if not self.filename:
+                return
+            if os.path.dirname(self.filename):
+                os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            with open(self.filename, 'a') as file:
+                for name, unit, value in entries:
+                    file.write(json.dumps({"stage": name, "key": unit, "data": value}) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+    def reset(self, stage):
+        """
+        Forgets a stage and the stages after it, for example when the inventory the journal was written for is gone.
+        Inputs:
+            - stage - inventory, eox or upload
+        """
+        with self.lock:
+            for name in self.stages[self.stages.index(stage):]:
+                self.done.pop(name, None)
+            if not self.filename or not os.path.isfile(self.filename):
+                return
+            #the journal is rewritten with the units that are left and replaced in one step
+            tmpfilename = self.filename + ".tmp"
+            with open(tmpfilename, 'w') as file:
+                for name, units in self.done.items():
+                    for key, data in units.items():
+                        file.write(json.dumps({"stage": name, "key": key, "data": data}) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmpfilename, self.filename)
+
+    def clear(self):
+        """
+        Removes the journal once the whole run has finished.
+        """
+        with self.lock:
+            self.done = {}
+            if self.filename and os.path.isfile(self.filename):
+                os.remove(self.filename)
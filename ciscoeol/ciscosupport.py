@@ -0,0 +1,687 @@
+import csv,re,threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor,as_completed
+from .cache import classEOXCache
+from .config import classSetting
+from .console import Fore
+from .filters import classFilter
+from .inventory import classInventory
+from .report import classReport
+from .transport import classRateLimiter,classToken,classTransport
+
+class classCiscoSupport():
+    """
+    This class is used to perform all functions from within Cisco EOL API.
+    The restAPI user and URL are hard coded in the env file and used in many functions.
+    """
+
+    #set NetBrain login information from environment variable file
+    usr = classSetting('CISCOEOL_USER')
+    pwd = classSetting('CISCOEOL_PASSWORD')
+    eolserialfilename = classSetting('CISCOEOL_SERIALS')
+    eolreportfilename = classSetting('CISCOEOL_REPORT')
+    #optional csv export when the report itself is parquet
+    eolreportcsvfilename = classSetting('CISCOEOL_REPORT_CSV')
+    #optional SQLite cache of EOX results by serial
+    eolcachefilename = classSetting('CISCOEOL_CACHE')
+    #number of EOX batch requests kept in flight and the API quotas they must stay within
+    max_workers = classSetting('CISCOEOL_MAX_WORKERS', 4, int)
+    rate_per_second = classSetting('CISCOEOL_RATE_PER_SECOND', 10.0, float)
+    rate_per_day = classSetting('CISCOEOL_RATE_PER_DAY', 5000, int)
+    #limits of one EOX call.  Batches are packed up to both, long module serials make for long urls
+    max_serials = classSetting('CISCOEOL_MAX_SERIALS', 20, int)
+    max_url_length = classSetting('CISCOEOL_MAX_URL_LENGTH', 2048, int)
+    #serials the API rejects are kept in this csv.  More than max_quarantine of them fails the run, the API is down then
+    quarantinefilename = classSetting('CISCOEOL_QUARANTINE')
+    max_quarantine = classSetting('CISCOEOL_MAX_QUARANTINE', 100, int)
+    #answer serials from the EOX dates of their product ID (device model, module type) where that is unambiguous
+    pid_lookup = classSetting('CISCOEOL_PID_LOOKUP', False, classSetting.flag)
+    #print the whole report and every batch instead of a summary
+    verbose = classSetting('CISCOEOL_VERBOSE', False, classSetting.flag)
+
+    #cells that hold the label of a serial instead of the serial itself
+    junk_serial = re.compile('Serial:|MAC:', re.IGNORECASE)
+
+    #Set base url for project.  Both can be pointed at mockserver.py for offline runs
+    base_url = classSetting('CISCOEOL_BASE_URL', "https://apix.cisco.com/supporttools/eox/rest/5/")
+    token_url = classSetting('CISCOEOL_TOKEN_URL', "https://id.cisco.com/oauth2/default/v1/token")
+
+    def __init__(self):
+        """
+        Prompt for credentials for Cisco Support RestAPI.
+        """
+        #the token manager gets a new OAuth token before the current one expires
+        self.tokenmanager = classToken(self.login)
+        #429 is left to the rate limiter so every worker backs off together
+        self.session = classTransport(pool_size=self.max_workers, retry_statuses=(500, 502, 503, 504),
+            token=self.tokenmanager, header="Authorization", prefix="Bearer ")
+        self.limiter = classRateLimiter(self.rate_per_second, self.rate_per_day)
+        self.headers = self.get_headers()
+        self.token = self.get_token()
+        #serials answered by a previous run are kept in the cache until their TTL expires
+        self.cache = classEOXCache(self.eolcachefilename) if self.eolcachefilename else None
+        #serial: error of every serial the API rejected on its own
+        self.quarantine = {}
+        #devices and modules that are not checked are dropped before their serials are batched
+        self.filter = classFilter()
+        #product ID: (status, eoldate) of the PID lookup, None for product IDs left to the serial lookup
+        self.pidtable = {}
+        self.lock = threading.Lock()
+
+    def get_headers(self):
+        """
+        Creates the login headers for Cisco Support RestAPI.
+        Inputs: 
+        Outputs:
+            - headers
+        """
+        #Set restAPI header information into dictionary
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept": "*/*",
+            }
+        return (headers)    
+
+    def get_token(self):
+        """
+        Retrieves a token for Cisco Support RestAPI through the token manager.
+        Inputs:
+        Outputs:
+            - token
+        """
+        print("=" * 50)
+        try:
+            token = self.tokenmanager.refresh()
+            self.headers["Token"] = token
+            return (token)
+        except Exception as e:
+            print(str(e))
+            return (str(e))
+
+    def login(self):
+        """
+        Retrieves an OAuth token for Cisco Support RestAPI.  Used by the token manager.
+        Inputs: client_id, client_secret
+        Outputs:
+            - (token, expires_in), or an error string
+        """
+        #set url
+        url = self.token_url
+
+        #set the credentials
+        usr=self.usr
+        pwd=self.pwd
+
+        #Set data.  Authentication is required to get a token
+        data = {
+            "grant_type": "client_credentials",
+            "client_id" : usr,
+            "client_secret" : pwd,
+        }
+
+        #run api call
+        try:
+            resp = self.session.post(url,params=data,headers=self.get_headers(), verify=True, auth=False)
+            #check for HTTP codes other than 200
+            if resp.status_code == 200:
+                token = str(resp.json()['access_token'])
+                #print(f'{Fore.CYAN}I GOT A TOKEN!!!{Fore.RESET}')
+                #print ("token = " + token)
+                return ((token, resp.json().get('expires_in')))
+            else:
+                print (f'Get token failed! - {str(resp.text)}')
+                return (f'Get token failed! - {str(resp.text)}')
+        except Exception as e:
+            print(str(e))
+            return (str(e))
+
+    @staticmethod
+    def normalize_serial(serial):
+        """
+        Normalizes a serial the way Cisco Support RestAPI echoes it back, so requests and answers match.
+        Inputs:
+            - serial
+        Outputs:
+            - serial without whitespace, in upper case
+        """
+        return ("".join(str(serial).split()).upper())
+
+    def parse_eox_records(self, records):
+        """
+        Parses EOXRecord entries from the Cisco Support RestAPI in one vectorized pass.
+        Inputs:
+            - records - list of EOXRecord entries, collected from any number of batches
+        Outputs:
+            - result - dataframe with one row per normalized serial in EOXInputValue and the columns serial,
+              status and eoldate.  status is announced, notannounced or notfound
+        """
+        #pandas is only imported by the stages that use it, so importing the package stays fast
+        import pandas as pd
+        columns = ['EOXInputValue', 'EOLProductID', 'LastDateOfSupport.value', 'EOXError.ErrorID', 'EOXError.ErrorDataValue']
+        if not records:
+            return (pd.DataFrame(columns=['serial', 'status', 'eoldate']))
+        df = pd.json_normalize(records).reindex(columns=columns).fillna("")
+
+        eolproductid = df['EOLProductID']
+        eolerror = df['EOXError.ErrorID']
+        #if product id is not empty, that means it's EOL
+        announced = eolproductid != ""
+        #if the product id is empty, it is either not found or not EOL. SSA_ERR_015 is not found, SSA_ERR_010 is invalid.
+        #SSA_ERR_026 is not EOL, unless the product id in ErrorDataValue is blank which means the device doesn't exist
+        notannounced = ~announced & (eolerror == "SSA_ERR_026") & (df['EOXError.ErrorDataValue'] != "")
+        notfound = ~announced & ~notannounced & eolerror.isin(["SSA_ERR_015", "SSA_ERR_010", "SSA_ERR_026"])
+        unknown = ~(announced | notannounced | notfound)
+        if unknown.any():
+            print ("Retrieval failed! -" + str(df.loc[unknown, 'EOXError.ErrorID'].tolist()))
+
+        result = pd.DataFrame({
+            'serial': df['EOXInputValue'],
+            'status': "notfound",
+            'eoldate': "",
+        })
+        result.loc[announced, 'status'] = "announced"
+        result.loc[announced, 'eoldate'] = df.loc[announced, 'LastDateOfSupport.value']
+        result.loc[notannounced, 'status'] = "notannounced"
+        result.loc[notannounced, 'eoldate'] = "Not Announced"
+        result = result[~unknown]
+        #some entries for modules show up with several comma separated serials
+        result = result.assign(serial=result['serial'].str.split(",")).explode('serial')
+        #normalize the same way as normalize_serial()
+        result['serial'] = result['serial'].str.replace(r"\s+", "", regex=True).str.upper()
+        return (result.reset_index(drop=True))
+
+    def get_eox_batch(self, serials, tokenheaders, endpoint="EOXBySerialNumber"):
+        """
+        Retrieves the EOX records for one batch of serials, waiting on the rate limiter first.
+        Inputs:
+            - serials - list of up to 20 serials
+            - tokenheaders
+            - endpoint - EOXBySerialNumber, or EOXByProductID to look up a batch of product IDs
+        Outputs:
+            - result - list of raw EOXRecord entries, or an error string.  A call the API rejected for the serials it
+              holds returns a classRejectedBatch error string
+        """
+        records = []
+        page = 1
+        attempt = 0
+        while True:
+            #set url and join the serials with commas as required by Cisco Support RestAPI.  Product IDs can hold a /
+            url = self.base_url + endpoint + "/" + str(page) + "/" + ",".join(quote(i, safe="") for i in serials)
+            if not self.limiter.acquire():
+                return ("Retrieval failed! - daily quota of " + str(self.rate_per_day) + " calls used")
+            try:
+                resp = self.session.get(url, headers=tokenheaders, verify=True)
+            except Exception as e:
+                return (str(e))
+            #on 429 hold back every worker for Retry-After seconds and try again
+            if resp.status_code == 429:
+                self.session.metrics.count('eox_rate_limited')
+                attempt = attempt + 1
+                if attempt > classTransport.retries:
+                    return ("Retrieval failed! - still rate limited after " + str(classTransport.retries) + " retries")
+                try:
+                    retryafter = float(resp.headers.get('Retry-After', 1))
+                except ValueError:
+                    retryafter = 1.0
+                self.limiter.pause(retryafter)
+                continue
+            #if the response code isn't 200 then something went wrong
+            if resp.status_code != 200:
+                error = "Retrieval failed! -" + str(resp.text)
+                #a bad request, a too long url or a server error left after the retries point at the serials of the batch.
+                #a token that is still refused after the replay does not
+                if resp.status_code in (400, 414) or resp.status_code >= 500:
+                    return (classRejectedBatch(error))
+                return (error)
+
+            #establish the base index of the json output.  Parsing is done for many batches at once
+            data = resp.json()
+            records.extend(data['EOXRecord'])
+            #a product ID can have more records than fit on one page
+            if page >= int(data.get('PaginationResponseRecord', {}).get('LastIndex') or 1):
+                return (records)
+            page = page + 1
+
+    def get_eox_records(self, serials, tokenheaders):
+        """
+        Retrieves the EOX records for one batch of serials.  A batch the API rejects is split in half until the
+        serials that cause the failure are found, those are quarantined instead of failing the whole run.
+        Inputs:
+            - serials - list of serials from get_batch_planner()
+            - tokenheaders
+        Outputs:
+            - result - list of raw EOXRecord entries for the serials that were not quarantined, or an error string
+              if the login, the connection or the daily quota failed or more than max_quarantine serials were rejected
+        """
+        result = self.get_eox_batch(serials, tokenheaders)
+        #only a batch rejected for the serials it holds is split.  A failed login or connection, or a used up quota,
+        #would fail every half the same way and quarantine serials that are fine
+        if not isinstance(result, classRejectedBatch):
+            return (result)
+        if len(serials) == 1:
+            with self.lock:
+                self.quarantine[serials[0]] = result
+                quarantined = len(self.quarantine)
+            print (f'{Fore.YELLOW}Quarantined serial {serials[0]} - {result}{Fore.RESET}')
+            #this many bad serials means the API is failing, not the CMDB entries
+            if quarantined > self.max_quarantine:
+                return ("Retrieval failed! - more than " + str(self.max_quarantine) + " serials rejected, last one: " + result)
+            return ([])
+        self.session.metrics.count('eox_bisections')
+        records = []
+        half = len(serials) // 2
+        for part in (serials[:half], serials[half:]):
+            result = self.get_eox_records(part, tokenheaders)
+            if isinstance(result, str):
+                return (result)
+            records.extend(result)
+        return (records)
+
+    def get_batch_planner(self, endpoint="EOXBySerialNumber"):
+        """
+        Inputs:
+            - endpoint - EOXBySerialNumber, or EOXByProductID
+        Outputs:
+            - classBatchPlanner for the EOX calls of this API
+        """
+        return (classBatchPlanner(self.base_url + endpoint + "/1/", self.max_serials, self.max_url_length))
+
+    def get_pid_answers(self, pids, tokenheaders):
+        """
+        Looks up the EOX dates of product IDs, from the cache first and then in batches from EOXByProductID.
+        Only product IDs with one announced date are answered.  Not Announced can't be told apart from a product ID
+        Cisco doesn't know, and several differing dates can't be told apart without the serial, so those are left
+        to the serial lookup.
+        Inputs:
+            - pids - list of normalized product IDs
+            - tokenheaders
+        Outputs:
+            - result - dictionary of product ID: (status, eoldate) for the product IDs that were answered, or an
+              error string if the login, the connection or the daily quota failed
+        """
+        answers = {}
+        metrics = self.session.metrics
+        if self.cache and pids:
+            answers.update(self.cache.get_many(pids, table="pid"))
+            pids = [i for i in pids if i not in answers]
+        fresh = {}
+        for batch in self.iter_serial_batches(pids, endpoint="EOXByProductID"):
+            metrics.count('pid_batches')
+            result = self.get_eox_batch(batch, tokenheaders, endpoint="EOXByProductID")
+            if isinstance(result, str):
+                if not isinstance(result, classRejectedBatch):
+                    return (result)
+                #the serials of these product IDs are looked up one by one instead
+                print (f'{Fore.YELLOW}Product ID lookup failed, using the serials of {batch} - {result}{Fore.RESET}')
+                continue
+            parsed = self.parse_eox_records(result)
+            parsed = parsed[parsed['serial'].isin(batch)]
+            #product IDs left to the serial lookup are kept as notfound, so the cache doesn't ask for them again
+            fresh.update((i, ("notfound", "")) for i in batch)
+            for pid, rows in parsed.groupby('serial'):
+                if (rows['status'] == "announced").all() and rows['eoldate'].nunique() == 1:
+                    fresh[pid] = ("announced", rows['eoldate'].iloc[0])
+        if self.cache:
+            self.cache.put_many(fresh, table="pid")
+        answers.update(fresh)
+        answers = {i: outcome for i, outcome in answers.items() if outcome[0] == "announced"}
+        metrics.count('pid_answered', len(answers))
+        return (answers)
+
+    def resolve_by_pid(self, serialpids, tokenheaders):
+        """
+        Answers serials from the EOX dates of their product IDs.  The product ID table is kept for the whole run,
+        so each product ID is only looked up once however many pages or batches ask for it.
+        Inputs:
+            - serialpids - dictionary of normalized serial: set of product IDs reported for it
+            - tokenheaders
+        Outputs:
+            - result - dictionary of serial: (status, eoldate) for the serials answered by their product ID, or
+              an error string.  Serials without a product ID or with several different ones are not answered
+        """
+        #a serial is only answered by a product ID if every row that reports it agrees on one
+        unique = {serial: next(iter(pids)) for serial, pids in serialpids.items() if len(pids) == 1 and "" not in pids}
+        with self.lock:
+            pids = sorted({i for i in unique.values() if i not in self.pidtable})
+            #claimed product IDs are not looked up again by another thread
+            self.pidtable.update((i, None) for i in pids)
+        if pids:
+            result = self.get_pid_answers(pids, tokenheaders)
+            if isinstance(result, str):
+                return (result)
+            with self.lock:
+                self.pidtable.update(result)
+        answers = {}
+        for serial, pid in unique.items():
+            outcome = self.pidtable.get(pid)
+            if outcome:
+                answers[serial] = outcome
+        self.session.metrics.count('eox_pid_answers', len(answers))
+        return (answers)
+
+    def write_quarantine(self):
+        """
+        Reports the serials the API rejected and keeps them in the quarantine csv for the CMDB to be fixed.
+        """
+        import pandas as pd
+        self.session.metrics.count('eox_quarantined', len(self.quarantine))
+        if self.quarantinefilename:
+            df = pd.DataFrame(list(self.quarantine.items()), columns=['serial', 'error'])
+            df.to_csv(self.quarantinefilename, index=False)
+        if self.quarantine:
+            print (f'{Fore.YELLOW}{len(self.quarantine)} serials rejected by Cisco Support API were left off the report{Fore.RESET}')
+
+    @classmethod
+    def iter_serials(cls, devices):
+        """
+        Extracts the device and module serials from NetBrain devices in one pass.  Module serials that are blank,
+        N/A or the serial of the device itself are skipped, cells with several comma separated serials are split and
+        labels like "Serial:" or "MAC:" are dropped.
+        Inputs:
+            - devices - iterable of device dictionaries, for example classInventory.read() or one device page
+        Outputs:
+            - (serial, hostname, modulename, product ID, domain) per serial, serial and product ID normalized.
+              modulename is blank for the device, the product ID is the device model or the module type.  domain is
+              the tenant:domain a sharded run tagged the device with, blank otherwise
+        """
+        junk = cls.junk_serial.search
+        normalize = cls.normalize_serial
+        for device in devices:
+            devicesn = device['sn']
+            hostname = device['name']
+            domain = device.get('domain', "")
+            cells = [(devicesn, "", normalize(device.get('model') or ""))]
+            if "attributes" in device:
+                for module in device['attributes'].values():
+                    sn = module['sn']
+                    #if serialnumber is blank or N/A, or the device serial number matches the module serial, skip it
+                    if str(sn) == "" or "N/A" in str(sn) or devicesn == sn:
+                        continue
+                    cells.append((sn, module['name'], normalize(module.get('type') or "")))
+            for sn, modulename, pid in cells:
+                #a serial that isn't text can't be looked up
+                if not isinstance(sn, str):
+                    continue
+                #if there are multiple comma-separated serials per cell, each is a serial of its own
+                for serial in sn.split(','):
+                    #drop labels like "Serial:" or "MAC:", and serials that are blank once the whitespace is gone
+                    if junk(serial):
+                        continue
+                    serial = normalize(serial)
+                    if serial:
+                        yield (serial, hostname, modulename, pid, domain)
+
+    def get_serial_owners(self, inventoryfilename, pids=None):
+        """
+        Extracts the device and module serials from the NetBrain inventory.
+        Inputs:
+            - inventoryfilename - json inventory written from get_all_devices_and_attributes()
+            - pids - optional dictionary filled with normalized serial: set of product IDs reported for it
+        Outputs:
+            - owners - dictionary of normalized serial: [(hostname, modulename, domain), ...]
+        """
+        table = list(self.iter_serials(self.filter.apply(classInventory.read(inventoryfilename))))
+        #optionally keep the serial list as csv without any headers or index numbers
+        if self.eolserialfilename:
+            with open(self.eolserialfilename, 'w', newline='') as file:
+                csv.writer(file).writerows(row[:3] for row in table)
+
+        #the same serial can be reported by several devices (stack members, shared chassis, duplicated CMDB entries).
+        #build one entry per unique serial with the list of (hostname, modulename, domain) rows that own it.
+        #the keys are normalized serials, so this is also the index used to match the API answers
+        owners = {}
+        for serial, hostname, modulename, pid, domain in table:
+            owners.setdefault(serial, []).append((hostname, modulename, domain))
+            if pids is not None:
+                pids.setdefault(serial, set()).add(pid)
+        print (f'{len(table)} serials, {len(owners)} unique')
+        return (owners)
+
+    def iter_serial_batches(self, owners, endpoint="EOXBySerialNumber"):
+        """
+        Yields ready to send batches of unique serials.
+        Inputs:
+            - owners - dictionary from get_serial_owners(), or any iterable of serials
+            - endpoint - EOXBySerialNumber, or EOXByProductID for batches of product IDs
+        Outputs:
+            - list of serials per batch, within the limits of one EOX call
+        """
+        planner = self.get_batch_planner(endpoint)
+        for serial in owners:
+            batch = planner.add(serial)
+            if batch:
+                yield (batch)
+        batch = planner.flush()
+        if batch:
+            yield (batch)
+
+    def get_report(self, owners, outcomes):
+        """
+        Fans the answers out to every hostname and module that owns the serial with one merge.
+        Serials that were not found or are invalid are left off the report.
+        Inputs:
+            - owners - dictionary from get_serial_owners()
+            - outcomes - dataframe of serial, status, eoldate with one row per serial
+        Outputs:
+            - report - dataframe of the hostname, modulename, deviceserial and EOLDate columns, and the domain column
+              when the inventory covers several domains
+        """
+        import pandas as pd
+        ownertable = pd.DataFrame(
+            [(serial, hostname, modulename, domain) for serial, rows in owners.items() for hostname, modulename, domain in rows],
+            columns=['deviceserial', 'hostname', 'modulename', 'domain'])
+        df = ownertable.merge(outcomes[outcomes['status'] != "notfound"], left_on='deviceserial', right_on='serial', how='inner')
+        columns = ['hostname', 'modulename', 'deviceserial', 'eoldate']
+        #the same hostname can be in several domains, their rows are told apart by the domain
+        if (df['domain'] != "").any():
+            columns.append('domain')
+        return (df[columns].rename(columns={'eoldate': 'EOLDate'}))
+
+    def write_report(self, report):
+        """
+        Writes the EOL report in one step, see classReport.write().
+        Inputs:
+            - report - dictionary of the hostname, modulename, deviceserial and EOLDate columns, and optionally domain
+        """
+        classReport.write(report, self.eolreportfilename, self.eolreportcsvfilename)
+
+    def get_eol(self, inventoryfilename, checkpoint=None):
+        """
+        Retrieves EOL dates by serial from Cisco Support RestAPI.
+        Inputs:
+            - token
+            - inventoryfilename - inventory written from get_all_devices_and_attributes()
+            - checkpoint - classCheckpoint recording each completed batch, so a rerun only sends unfinished batches
+        Outputs:
+            - result - error string if the login or a batch failed
+        """
+        import pandas as pd
+        #the report of a finished stage is already in place
+        if checkpoint and 'done' in checkpoint.completed('eox'):
+            print (f'{Fore.YELLOW}EOL report already complete, skipping{Fore.RESET}')
+            return
+        #without a first token every batch would log in again, so a failed login ends the lookup here
+        if self.tokenmanager.token is None:
+            return (self.token)
+
+        #set the headers.  The session adds the current token from the token manager to every call
+        tokenheaders = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            }
+
+        print("=" * 50)
+        metrics = self.session.metrics
+        #extract the serials and the rows that own them from the inventory
+        pids = {} if self.pid_lookup else None
+        with metrics.stage('serial_extract'):
+            owners = self.get_serial_owners(inventoryfilename, pids)
+        uniqueserials = len(owners)
+        metrics.count('eox_unique_serials', uniqueserials)
+
+        #raw records of every batch are collected and parsed together at the end.
+        #the batches an interrupted run already completed are taken from the checkpoint
+        records = []
+        fetched = []
+        resumed = set()
+        if checkpoint:
+            for batch in checkpoint.completed('eox').values():
+                resumed.update(batch['serials'])
+                records.extend(batch['records'])
+                self.quarantine.update(batch.get('quarantined', {}))
+        metrics.count('eox_resumed', len(resumed))
+        #answers from the cache as (serial, status, eoldate)
+        cached = []
+
+        #serials answered by the EOX dates of their product ID are not looked up one by one
+        bypid = {}
+        if self.pid_lookup:
+            with metrics.stage('pid_lookup'):
+                bypid = self.resolve_by_pid({i: pids[i] for i in owners if i not in resumed}, tokenheaders)
+            if isinstance(bypid, str):
+                print (bypid)
+                return (bypid)
+            print (f'{Fore.CYAN}{len(bypid)} of {uniqueserials} unique serials answered by their product ID{Fore.RESET}')
+
+        count = len(resumed) + len(bypid)
+        #without verbose output progress is shown every 10%
+        step = max(uniqueserials // 10, 1)
+        nextprogress = count + step
+        #keep max_workers batches in flight.  The rate limiter keeps them within the API quota
+        with metrics.stage('eox_lookup'), ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            #the serials left after the checkpoint and the cache are packed into as few calls as possible
+            planner = self.get_batch_planner()
+            #loop through full batches of unique serials
+            for serialchunk in self.iter_serial_batches(owners):
+                #serials answered by the checkpoint, the product ID or the cache don't need to be sent to the API
+                misses = [i for i in serialchunk if i not in resumed and i not in bypid]
+                if self.cache and misses:
+                    hits = self.cache.get_many(misses)
+                    cached.extend((i, status, eoldate) for i, (status, eoldate) in hits.items())
+                    count = count + len(hits)
+                    misses = [i for i in misses if i not in hits]
+                for batch in map(planner.add, misses):
+                    if batch:
+                        futures[pool.submit(self.get_eox_records, batch, tokenheaders)] = batch
+            batch = planner.flush()
+            if batch:
+                futures[pool.submit(self.get_eox_records, batch, tokenheaders)] = batch
+            metrics.count('eox_cache_hits', len(cached))
+            metrics.count('eox_cache_misses', sum(len(serials) for serials in futures.values()))
+            metrics.count('eox_batches', len(futures))
+
+            for future in as_completed(futures):
+                result = future.result()
+                #if a batch failed then stop. completed batches are kept in the checkpoint
+                if isinstance(result, str):
+                    for pending in futures:
+                        pending.cancel()
+                    print (result)
+                    return (result)
+                fetched.extend(result)
+                if checkpoint:
+                    quarantined = {i: self.quarantine[i] for i in futures[future] if i in self.quarantine}
+                    checkpoint.record('eox', futures[future][0], {"serials": futures[future], "records": result,
+                        "quarantined": quarantined})
+                count = count + len(futures[future])
+                #show progress of all unique serials
+                if self.verbose or count >= nextprogress:
+                    print ('Progress: [',count,'/',uniqueserials,']')
+                    nextprogress = count + step
+
+        with metrics.stage('eox_parse'):
+            #parse every record in one pass and add the cached answers
+            parsed = self.parse_eox_records(fetched)
+            outcomes = pd.concat([
+                parsed,
+                self.parse_eox_records(records),
+                pd.DataFrame(cached, columns=['serial', 'status', 'eoldate']),
+                pd.DataFrame([(i, status, eoldate) for i, (status, eoldate) in bypid.items()], columns=['serial', 'status', 'eoldate']),
+            ], ignore_index=True)
+            #drop answers for serials that were not asked for
+            asked = outcomes['serial'].isin(owners.keys())
+            if not asked.all():
+                print (f'{Fore.YELLOW}Skipping answers for serials that were not requested: {outcomes.loc[~asked, "serial"].tolist()}{Fore.RESET}')
+            outcomes = outcomes[asked].drop_duplicates(subset='serial')
+            #remember the fresh answers for the next run
+            if self.cache:
+                parsed = parsed[parsed['serial'].isin(owners.keys())].drop_duplicates(subset='serial')
+                self.cache.put_many({i: (status, eoldate) for i, status, eoldate in parsed.itertuples(index=False, name=None)})
+
+            report = self.get_report(owners, outcomes)
+        for status, value in outcomes['status'].value_counts().items():
+            metrics.count('eox_' + status, int(value))
+        metrics.count('report_rows', len(report.index))
+        #the whole report is only printed with verbose output
+        if self.verbose:
+            print (f'{Fore.CYAN}{report}{Fore.RESET}')
+        else:
+            print (f'{Fore.CYAN}{len(report.index)} report rows for {uniqueserials} unique serials{Fore.RESET}')
+
+        #write the whole report at once
+        with metrics.stage('report_write'):
+            self.write_report(report)
+        self.write_quarantine()
+        if checkpoint:
+            checkpoint.record('eox', 'done')
+        if self.cache:
+            print (f'{Fore.CYAN}{len(cached)} of {uniqueserials} unique serials answered from the EOX cache{Fore.RESET}')
+
+class classRejectedBatch(str):
+    """
+    This class is the error string of an EOX call the API rejected for the serials or product IDs it holds, as
+    opposed to a failed login or connection.  Only these batches are split to find the serials at fault.
+    """
+
+class classBatchPlanner():
+    """
+    This class packs serials into batches that stay within the serial count and url length one EOX call accepts.
+    """
+
+    def __init__(self, url, max_serials, max_url_length):
+        """
+        Inputs:
+            - url - url the comma separated serials are appended to
+            - max_serials - serials per call
+            - max_url_length - characters of the whole url
+        """
+        self.url = url
+        self.max_serials = max_serials
+        self.max_url_length = max_url_length
+        self.batch = []
+        self.length = len(url)
+
+    def add(self, serial):
+        """
+        Adds a serial to the batch being packed.
+        Inputs:
+            - serial
+        Outputs:
+            - batch - list of serials once a batch is full, otherwise None.  A serial too long for any batch is
+              sent on its own, the API rejects it and it is quarantined
+        """
+        batch = None
+        #the serial is sent url encoded
+        size = len(quote(serial, safe=""))
+        size = size + 1 if self.batch else size
+        #the serial doesn't fit in the url anymore, send the batch without it
+        if self.batch and self.length + size > self.max_url_length:
+            batch = self.flush()
+            #the first serial of a batch has no comma in front of it
+            size = size - 1
+        self.batch.append(serial)
+        self.length = self.length + size
+        if len(self.batch) >= self.max_serials:
+            batch = self.flush()
+        return (batch)
+
+    def flush(self):
+        """
+        Outputs:
+            - batch - the serials packed so far, the batch starts over empty
+        """
+        batch = self.batch
+        self.batch = []
+        self.length = len(self.url)
+        return (batch)
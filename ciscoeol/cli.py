@@ -0,0 +1,158 @@
+import argparse,os,sys
+from .checkpoint import classCheckpoint
+from .ciscosupport import classCiscoSupport
+from .config import load_env
+from .filters import classFilter
+from .console import Fore
+from .inventory import classInventory
+from .metrics import classMetrics
+from .netbrain import classNetbrain
+from .pipeline import classPipeline
+from .sharded import classShardedRun
+
+#stream the json lines inventory from netbrain to a file while the pages arrive
+inventoryfilename = '~/Desktop/lcm-fullinventory.jsonl'
+
+def fetch_inventory(options, checkpoint):
+    """
+    Gathers all devices and modules from NetBrain into the inventory, in device name order.
+    Outputs:
+        - error string, or None
+    """
+    netbrain = classNetbrain()
+    token = netbrain.get_token()
+    if netbrain.tokenmanager.token is None:
+        return (token)
+    #only the attributes the EOL check reads are kept
+    result = netbrain.get_all_devices_and_attributes(outputfilename=options.inventory,
+        fields=classNetbrain.eol_fields, modulefields=classNetbrain.eol_module_fields, checkpoint=checkpoint,
+        devicefilter=classFilter())
+    netbrain.logout()
+    if isinstance(result, str):
+        return (result)
+    #put the inventory in device name order without loading it into memory
+    with classMetrics.current().stage('inventory_sort'):
+        classInventory.sort(options.inventory)
+
+def lookup_eol(options, checkpoint):
+    """
+    Looks up the EOL dates of the serials of the inventory and writes the report.
+    Outputs:
+        - error string, or None
+    """
+    cisco = classCiscoSupport()
+    result = cisco.get_eol(options.inventory, checkpoint=checkpoint)
+    if cisco.cache:
+        cisco.cache.close()
+    if isinstance(result, str):
+        return (result)
+
+def upload(options, checkpoint):
+    """
+    Uploads the EOL dates of the report to NetBrain, only the values that changed since the inventory was fetched.
+    Outputs:
+        - error string, or None
+    """
+    netbrain = classNetbrain()
+    token = netbrain.get_token()
+    if netbrain.tokenmanager.token is None:
+        return (token)
+    failed = netbrain.add_eol_attributes(inventoryfilename=options.inventory, checkpoint=checkpoint)
+    netbrain.logout()
+    #the checkpoint is kept, so a rerun only uploads what failed
+    if failed:
+        return (f'{failed} EOL attribute uploads failed')
+
+def run(options, checkpoint):
+    """
+    Runs the whole EOL check.  Several domains or page shards are spread over a process pool, otherwise the
+    stages run one after the other or, with --pipeline, at the same time.
+    Outputs:
+        - error string, or None
+    """
+    if classShardedRun.enabled():
+        return (classShardedRun(options.inventory, checkpoint).run())
+    if getattr(options, 'pipeline', False) or classPipeline.enabled:
+        return (classPipeline(options.inventory).run())
+    for stage in (fetch_inventory, lookup_eol, upload):
+        result = stage(options, checkpoint)
+        if result:
+            return (result)
+
+#subcommand: (function, help)
+commands = {
+    "fetch-inventory": (fetch_inventory, "gather all devices and modules from NetBrain into the inventory"),
+    "lookup-eol": (lookup_eol, "look up the EOL dates of the inventory serials and write the report"),
+    "upload": (upload, "upload the EOL dates of the report to NetBrain"),
+    "run": (run, "fetch the inventory, look up the EOL dates and upload them (default)"),
+}
+
+def get_options(argv=None):
+    """
+    Parses the command line.  Without a subcommand the whole check is run.
+    Outputs:
+        - options
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--env-file", help=".env file to read instead of the one in the working directory")
+    common.add_argument("--inventory", default=inventoryfilename, help="JSON Lines inventory (default %(default)s)")
+    common.add_argument("--report", help="EOL report, csv or parquet (default CISCOEOL_REPORT)")
+    common.add_argument("--checkpoint", help="journal used to resume an unfinished run (default CISCOEOL_CHECKPOINT)")
+    common.add_argument("--fresh", action="store_true", help="discard the journal of an unfinished run first")
+    common.add_argument("--run-report", help="json run summary (default CISCOEOL_RUN_REPORT)")
+    common.add_argument("--prometheus-file", help="Prometheus textfile (default CISCOEOL_PROMETHEUS_FILE)")
+    common.add_argument("--verbose", action="store_true", help="print every EOX batch and the whole report")
+
+    parser = argparse.ArgumentParser(prog="ciscoeol",
+        description="Checks the EOL of the serials gathered from NetBrain against the Cisco Support API and uploads the dates back to NetBrain.  "
+        "NETBRAIN_DOMAINS and NETBRAIN_SHARDS only apply to run.")
+    subparsers = parser.add_subparsers(dest="command", metavar="{" + ",".join(commands) + "}")
+    for name, (function, text) in commands.items():
+        subparsers.add_parser(name, parents=[common], help=text, description=text)
+    subparsers.choices["run"].add_argument("--pipeline", action="store_true",
+        help="look up and upload each page of devices while the next pages are fetched (default CISCOEOL_PIPELINE)")
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in commands and argv[0] not in ("-h", "--help"):
+        argv = ["run"] + argv
+    return (parser.parse_args(argv))
+
+def main(argv=None):
+    """
+    Runs a subcommand.
+    Inputs:
+        - argv - command line arguments, defaults to sys.argv
+    Outputs:
+        - exit code
+    """
+    options = get_options(argv)
+    load_env(options.env_file)
+    #settings given on the command line are passed on through the environment, so worker processes see them too
+    for value, name in ((options.report, 'CISCOEOL_REPORT'), (options.checkpoint, 'CISCOEOL_CHECKPOINT'),
+            (options.run_report, 'CISCOEOL_RUN_REPORT'), (options.prometheus_file, 'CISCOEOL_PROMETHEUS_FILE')):
+        if value:
+            os.environ[name] = value
+    if options.verbose:
+        os.environ['CISCOEOL_VERBOSE'] = "true"
+    options.inventory = os.path.expanduser(options.inventory)
+
+    #journal of completed pages, batches and uploads.  Rerunning after a failure resumes from it
+    if options.fresh:
+        classCheckpoint().clear()
+    checkpoint = classCheckpoint()
+    #timings and API call metrics of the run, written to CISCOEOL_RUN_REPORT and CISCOEOL_PROMETHEUS_FILE at the end
+    metrics = classMetrics.current()
+    status = "failed"
+    try:
+        result = commands[options.command][0](options, checkpoint)
+        if result:
+            print (result, file=sys.stderr)
+            return (1)
+        #the journal only resumes a command that failed.  A finished stage is never skipped by the next scheduled job,
+        #which starts from scratch
+        checkpoint.clear()
+        status = "finished"
+        print(f'{Fore.GREEN}Finished{Fore.RESET}')
+        return (0)
+    finally:
+        #a failed run is reported too, it shows where the time went before it stopped
+        metrics.write(status=status, command=options.command)
@@ -0,0 +1,65 @@
+import os,threading
+
+#the .env file is read once, the first time a setting is used, so importing the package has no side effects
+envlock = threading.Lock()
+envloaded = False
+
+def load_env(filename=None):
+    """
+    Loads environment variables from the .env file.  Variables already set in the environment win.
+    Inputs:
+        - filename - .env file to read instead of the one found from the working directory
+    """
+    global envloaded
+    with envlock:
+        if envloaded and filename is None:
+            return
+        from dotenv import load_dotenv,find_dotenv
+        if filename:
+            load_dotenv(filename)
+        else:
+            #the .env of the working directory, then the one in the project root folder next to ciscoEOL.py
+            load_dotenv(find_dotenv(usecwd=True))
+            load_dotenv(find_dotenv())
+        envloaded = True
+
+class classSetting():
+    """
+    This class is a class attribute read from the environment variable file when it is used, not when the class is
+    defined.  Assigning the attribute on an instance or the class overrides it.
+    """
+
+    def __init__(self, name, default=None, cast=None):
+        """
+        Inputs:
+            - name - environment variable
+            - default - value when the variable is not set
+            - cast - function converting the text of the variable, for example int
+        """
+        self.name = name
+        self.default = default
+        self.cast = cast
+
+    def __get__(self, instance, owner):
+        load_env()
+        value = os.getenv(self.name)
+        #a blank number is treated as not set
+        if value is None or (value == "" and self.cast is not None):
+            return (self.default)
+        return (self.cast(value) if self.cast else value)
+
+    @staticmethod
+    def flag(value):
+        """
+        Outputs:
+            - True for 1, true or yes
+        """
+        return (value.strip().lower() in ("1", "true", "yes"))
+
+    @staticmethod
+    def list(value):
+        """
+        Outputs:
+            - tuple of the comma separated values, without blanks
+        """
+        return (tuple(i.strip() for i in value.split(",") if i.strip()))
@@ -0,0 +1,27 @@
+import threading
+
+#colorama is imported and initialized by the first colored print, not when the package is imported
+colorlock = threading.Lock()
+colorama = None
+
+class classColor():
+    """
+    This class stands in for colorama's Fore or Style.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attribute):
+        global colorama
+        if colorama is None:
+            with colorlock:
+                if colorama is None:
+                    import colorama as module
+                    #Initialize Colorama
+                    module.init()
+                    colorama = module
+        return (getattr(getattr(colorama, self.name), attribute))
+
+Fore = classColor("Fore")
+Style = classColor("Style")
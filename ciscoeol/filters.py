@@ -0,0 +1,101 @@
+import re
+from .config import classSetting
+from .metrics import classMetrics
+
+class classFilter():
+    """
+    This class decides which devices and modules the EOL check looks at.
+    Devices of other vendors, subtypes or sites are dropped before their modules are fetched, and modules of other
+    types before their serials are batched, so they cost neither NetBrain calls nor Cisco Support API quota.
+    Nothing is set by default, which keeps every device and module.
+    """
+
+    #comma separated and case insensitive.  An include list keeps only what it names, an exclude list drops what it names
+    include_vendors = classSetting('CISCOEOL_INCLUDE_VENDORS', (), classSetting.list)
+    exclude_vendors = classSetting('CISCOEOL_EXCLUDE_VENDORS', (), classSetting.list)
+    include_subtypes = classSetting('CISCOEOL_INCLUDE_SUBTYPES', (), classSetting.list)
+    exclude_subtypes = classSetting('CISCOEOL_EXCLUDE_SUBTYPES', (), classSetting.list)
+    #site paths the device site starts with, for example My Network\Region1
+    include_sites = classSetting('CISCOEOL_INCLUDE_SITES', (), classSetting.list)
+    exclude_sites = classSetting('CISCOEOL_EXCLUDE_SITES', (), classSetting.list)
+    #regular expressions searched in the module type, (?i) makes them case insensitive
+    include_module_types = classSetting('CISCOEOL_INCLUDE_MODULE_TYPES', None, re.compile)
+    exclude_module_types = classSetting('CISCOEOL_EXCLUDE_MODULE_TYPES', None, re.compile)
+
+    def __init__(self):
+        """
+        Reads the filters once, they are checked for every device and module.
+        """
+        self.vendors = {i.lower() for i in self.include_vendors}
+        self.notvendors = {i.lower() for i in self.exclude_vendors}
+        self.subtypes = {i.lower() for i in self.include_subtypes}
+        self.notsubtypes = {i.lower() for i in self.exclude_subtypes}
+        self.sites = tuple(i.lower() for i in self.include_sites)
+        self.notsites = tuple(i.lower() for i in self.exclude_sites)
+        self.moduletypes = self.include_module_types
+        self.notmoduletypes = self.exclude_module_types
+        self.checkdevices = bool(self.vendors or self.notvendors or self.subtypes or self.notsubtypes or self.sites or self.notsites)
+        self.checkmodules = self.moduletypes is not None or self.notmoduletypes is not None
+
+    def __bool__(self):
+        return (self.checkdevices or self.checkmodules)
+
+    def keep_device(self, device):
+        """
+        Inputs:
+            - device - device dictionary with the vendor, subTypeName and site attributes
+        Outputs:
+            - True if the device is checked
+        """
+        if not self.checkdevices:
+            return (True)
+        vendor = str(device.get('vendor') or "").lower()
+        if (self.vendors and vendor not in self.vendors) or vendor in self.notvendors:
+            return (False)
+        subtype = str(device.get('subTypeName') or "").lower()
+        if (self.subtypes and subtype not in self.subtypes) or subtype in self.notsubtypes:
+            return (False)
+        site = str(device.get('site') or "").lower()
+        if (self.sites and not site.startswith(self.sites)) or (self.notsites and site.startswith(self.notsites)):
+            return (False)
+        return (True)
+
+    def keep_module(self, module):
+        """
+        Inputs:
+            - module - module dictionary with the type attribute
+        Outputs:
+            - True if the serial of the module is checked
+        """
+        moduletype = str(module.get('type') or "")
+        if self.moduletypes is not None and not self.moduletypes.search(moduletype):
+            return (False)
+        if self.notmoduletypes is not None and self.notmoduletypes.search(moduletype):
+            return (False)
+        return (True)
+
+    def apply(self, devices):
+        """
+        Drops the devices and modules that are not checked.  The inventory may have been fetched without the
+        filters, so they are applied again before the serials are extracted.
+        Inputs:
+            - devices - iterable of device dictionaries
+        Outputs:
+            - the devices that are checked, without the modules that are not
+        """
+        if not self:
+            yield from devices
+            return
+        droppeddevices = droppedmodules = 0
+        for device in devices:
+            if not self.keep_device(device):
+                droppeddevices = droppeddevices + 1
+                continue
+            if self.checkmodules and device.get('attributes'):
+                attributes = {name: x for name, x in device['attributes'].items() if self.keep_module(x)}
+                droppedmodules = droppedmodules + len(device['attributes']) - len(attributes)
+                device = dict(device, attributes=attributes)
+            yield (device)
+        metrics = classMetrics.current()
+        metrics.count('filtered_devices', droppeddevices)
+        metrics.count('filtered_modules', droppedmodules)
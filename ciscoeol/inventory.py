@@ -0,0 +1,106 @@
+import heapq,itertools,json,os,tempfile
+
+class classInventory():
+    """
+    This class reads and writes the NetBrain inventory file.
+    The inventory is either one json list (the original format) or JSON Lines with one device per line,
+    which can be written and read one device at a time so memory stays flat regardless of fleet size.
+    """
+
+    class writer():
+        """
+        Context manager that writes devices to a JSON Lines file.  It does nothing if no filename is given.
+        If offset is given, the file is cut back to that byte offset and appended to, which is how a
+        checkpointed run resumes after the last completed page.
+        """
+        def __init__(self, filename, offset=None):
+            self.filename = os.path.expanduser(filename) if filename else None
+            self.offset = offset
+            self.file = None
+
+        def __enter__(self):
+            if not self.filename:
+                return (None)
+            if os.path.dirname(self.filename):
+                os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            if self.offset is not None and os.path.isfile(self.filename):
+                self.file = open(self.filename, 'r+b')
+                self.file.truncate(self.offset)
+                self.file.seek(self.offset)
+            else:
+                self.file = open(self.filename, 'wb')
+            return (self)
+
+        def __exit__(self, *exc):
+            if self.file:
+                self.file.close()
+
+        def write(self, device):
+            self.file.write((json.dumps(device) + "\n").encode())
+
+        def tell(self):
+            """
+            Flushes the file and returns the byte offset after the last device written.
+            """
+            self.file.flush()
+            return (self.file.tell())
+
+    @staticmethod
+    def read(filename):
+        """
+        Yields the devices of an inventory file one at a time.
+        Inputs:
+            - filename - json list or JSON Lines inventory
+        Outputs:
+            - device dictionaries
+        """
+        with open(os.path.expanduser(filename), 'r') as file:
+            #a json list starts with "[", JSON Lines starts with "{"
+            first = file.read(1)
+            while first.isspace():
+                first = file.read(1)
+            file.seek(0)
+            if first == "[":
+                yield from json.load(file)
+                return
+            for line in file:
+                if line.strip():
+                    yield (json.loads(line))
+
+    @staticmethod
+    def sort(filename, sortedfilename=None, runsize=10000):
+        """
+        Sorts a JSON Lines inventory by device name with an external merge sort, so only runsize devices
+        are held in memory at a time.
+        Inputs:
+            - filename - JSON Lines inventory
+            - sortedfilename - output file (defaults to replacing filename)
+            - runsize - devices sorted in memory per temporary run
+        Outputs:
+            - sortedfilename
+        """
+        filename = os.path.expanduser(filename)
+        sortedfilename = os.path.expanduser(sortedfilename) if sortedfilename else filename
+        key = lambda line: json.loads(line)['name'].lower()
+        runs = []
+        try:
+            #write sorted runs of runsize devices to temporary files
+            with open(filename, 'r') as file:
+                while True:
+                    lines = [line for line in itertools.islice(file, runsize) if line.strip()]
+                    if not lines:
+                        break
+                    lines.sort(key=key)
+                    run = tempfile.TemporaryFile('w+')
+                    run.writelines(lines)
+                    run.seek(0)
+                    runs.append(run)
+            #merge the runs into the output
+            tmpfilename = sortedfilename + ".tmp"
+            with open(tmpfilename, 'w') as out:
+                out.writelines(heapq.merge(*runs, key=key))
+            os.replace(tmpfilename, sortedfilename)
+        finally:
+            for run in runs:
+                run.close()
+        return (sortedfilename)
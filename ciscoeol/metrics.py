@@ -0,0 +1,238 @@
+import contextlib,json,os,threading,time
+from urllib.parse import urlparse
+from .config import classSetting
+
+class classMetrics():
+    """
+    This class records where the time of a run goes: the duration of every stage, and the calls, latency,
+    retries and bytes of every API endpoint, plus counters such as cache hits.
+    One instance is shared by every class of the process, see current().  Worker processes send theirs back
+    with export() to be merged into the run.
+    """
+
+    #optional json run summary and Prometheus textfile (for the node_exporter textfile collector)
+    runreportfilename = classSetting('CISCOEOL_RUN_REPORT')
+    prometheusfilename = classSetting('CISCOEOL_PROMETHEUS_FILE')
+
+    #upper bounds in seconds of the latency histogram buckets.  Slower calls are only counted in the total
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    instance = None
+    instancelock = threading.Lock()
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        #stage: seconds
+        self.stages = {}
+        #counter: value
+        self.counters = {}
+        #"METHOD path": {"count", "errors", "statuses", "retries", "bytes_sent", "bytes_received", "seconds", "max_seconds", "buckets"}
+        self.endpoints = {}
+
+    @classmethod
+    def current(cls):
+        """
+        Outputs:
+            - the metrics of this process
+        """
+        with cls.instancelock:
+            if cls.instance is None:
+                cls.instance = cls()
+            return (cls.instance)
+
+    @classmethod
+    def reset(cls):
+        """
+        Starts new metrics for this process, used by worker processes that run several tasks.
+        Outputs:
+            - the new metrics
+        """
+        with cls.instancelock:
+            cls.instance = cls()
+            return (cls.instance)
+
+    @staticmethod
+    def get_endpoint(method, url):
+        """
+        Names the endpoint of a call by its path.  Serials in the path of EOX calls are left out.
+        Outputs:
+            - "METHOD path"
+        """
+        path = urlparse(url).path
+        start = path.find("/EOXBy")
+        if start != -1:
+            end = path.find("/", start + 1)
+            path = path if end == -1 else path[:end]
+        return (method + " " + path)
+
+    def get_entry(self, endpoint):
+        #called with the lock held
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = {
+                "count": 0, "errors": 0, "statuses": {}, "retries": 0, "bytes_sent": 0, "bytes_received": 0,
+                "seconds": 0.0, "max_seconds": 0.0, "buckets": [0] * len(self.buckets),
+            }
+        return (self.endpoints[endpoint])
+
+    def record_request(self, method, url, seconds, status, retries=0, sent=0, received=0):
+        """
+        Records one call.
+        Inputs:
+            - method, url
+            - seconds - time the call took, including the retries done by the session
+            - status - HTTP status code, or "error" if the call raised
+            - retries - retries done by the session
+            - sent, received - bytes of the request and response body
+        """
+        endpoint = self.get_endpoint(method, url)
+        with self.lock:
+            entry = self.get_entry(endpoint)
+            entry["count"] += 1
+            entry["statuses"][str(status)] = entry["statuses"].get(str(status), 0) + 1
+            if status == "error" or status >= 400:
+                entry["errors"] += 1
+            entry["retries"] += retries
+            entry["bytes_sent"] += sent
+            entry["bytes_received"] += received
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry["buckets"][i] += 1
+                    break
+
+    def count(self, name, value=1):
+        """
+        Adds value to a counter.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Times a block and adds its duration to the stage.  A stage entered several times adds up.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def export(self):
+        """
+        Outputs:
+            - json ready dictionary of everything recorded
+        """
+        with self.lock:
+            endpoints = {}
+            for endpoint, entry in self.endpoints.items():
+                endpoints[endpoint] = dict(entry, statuses=dict(entry["statuses"]), buckets=list(entry["buckets"]))
+                endpoints[endpoint]["mean_seconds"] = entry["seconds"] / entry["count"] if entry["count"] else 0.0
+            return ({
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+                "seconds": time.time() - self.started,
+                "stages": dict(self.stages),
+                "counters": dict(self.counters),
+                "requests": sum(entry["count"] for entry in self.endpoints.values()),
+                "latency_buckets": list(self.buckets),
+                "endpoints": endpoints,
+            })
+
+    def merge(self, summary):
+        """
+        Adds the export() of another process to this one.
+        """
+        with self.lock:
+            for name, seconds in summary["stages"].items():
+                self.stages[name] = self.stages.get(name, 0.0) + seconds
+            for name, value in summary["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for endpoint, other in summary["endpoints"].items():
+                entry = self.get_entry(endpoint)
+                for key in ("count", "errors", "retries", "bytes_sent", "bytes_received", "seconds"):
+                    entry[key] += other[key]
+                entry["max_seconds"] = max(entry["max_seconds"], other["max_seconds"])
+                for status, value in other["statuses"].items():
+                    entry["statuses"][status] = entry["statuses"].get(status, 0) + value
+                entry["buckets"] = [a + b for a, b in zip(entry["buckets"], other["buckets"])]
+
+    def to_prometheus(self, summary):
+        """
+        Formats an export() in the Prometheus text format.
+        Outputs:
+            - text
+        """
+        def label(value):
+            return (str(value).replace("\\", "\\\\").replace('"', '\\"'))
+
+        lines = [
+            "# HELP ciscoeol_run_seconds Wall time of the run.",
+            "# TYPE ciscoeol_run_seconds gauge",
+            "ciscoeol_run_seconds %f" % summary["seconds"],
+            "# HELP ciscoeol_run_timestamp_seconds Time the run finished.",
+            "# TYPE ciscoeol_run_timestamp_seconds gauge",
+            "ciscoeol_run_timestamp_seconds %d" % time.time(),
+            "# HELP ciscoeol_stage_seconds Time spent in each stage of the run.",
+            "# TYPE ciscoeol_stage_seconds gauge",
+        ]
+        lines.extend('ciscoeol_stage_seconds{stage="%s"} %f' % (label(name), seconds) for name, seconds in sorted(summary["stages"].items()))
+        lines.extend([
+            "# HELP ciscoeol_events_total Counters of the run such as cache hits.",
+            "# TYPE ciscoeol_events_total counter",
+        ])
+        lines.extend('ciscoeol_events_total{event="%s"} %s' % (label(name), value) for name, value in sorted(summary["counters"].items()))
+        endpoints = sorted(summary["endpoints"].items())
+        lines.extend([
+            "# HELP ciscoeol_requests_total API calls by endpoint and status.",
+            "# TYPE ciscoeol_requests_total counter",
+        ])
+        for endpoint, entry in endpoints:
+            for status, value in sorted(entry["statuses"].items()):
+                lines.append('ciscoeol_requests_total{endpoint="%s",status="%s"} %d' % (label(endpoint), label(status), value))
+        for name, key, text in (
+                ("ciscoeol_request_retries_total", "retries", "Retries done by the HTTP session."),
+                ("ciscoeol_request_sent_bytes_total", "bytes_sent", "Request body bytes."),
+                ("ciscoeol_request_received_bytes_total", "bytes_received", "Response body bytes.")):
+            lines.extend(["# HELP %s %s" % (name, text), "# TYPE %s counter" % name])
+            lines.extend('%s{endpoint="%s"} %d' % (name, label(endpoint), entry[key]) for endpoint, entry in endpoints)
+        lines.extend([
+            "# HELP ciscoeol_request_duration_seconds API call latency including session retries.",
+            "# TYPE ciscoeol_request_duration_seconds histogram",
+        ])
+        for endpoint, entry in endpoints:
+            cumulative = 0
+            for bound, value in zip(summary["latency_buckets"], entry["buckets"]):
+                cumulative += value
+                lines.append('ciscoeol_request_duration_seconds_bucket{endpoint="%s",le="%g"} %d' % (label(endpoint), bound, cumulative))
+            lines.append('ciscoeol_request_duration_seconds_bucket{endpoint="%s",le="+Inf"} %d' % (label(endpoint), entry["count"]))
+            lines.append('ciscoeol_request_duration_seconds_sum{endpoint="%s"} %f' % (label(endpoint), entry["seconds"]))
+            lines.append('ciscoeol_request_duration_seconds_count{endpoint="%s"} %d' % (label(endpoint), entry["count"]))
+        return ("\n".join(lines) + "\n")
+
+    def write(self, runreportfilename=None, prometheusfilename=None, **extra):
+        """
+        Writes the json run summary and the Prometheus textfile, each replaced in one step.
+        Inputs:
+            - runreportfilename, prometheusfilename - default to CISCOEOL_RUN_REPORT and CISCOEOL_PROMETHEUS_FILE
+            - extra - added to the top level of the json summary, for example status
+        Outputs:
+            - summary
+        """
+        runreportfilename = runreportfilename or self.runreportfilename
+        prometheusfilename = prometheusfilename or self.prometheusfilename
+        summary = self.export()
+        summary.update(extra)
+        for filename, text in ((runreportfilename, lambda: json.dumps(summary, indent=4)),
+                (prometheusfilename, lambda: self.to_prometheus(summary))):
+            if not filename:
+                continue
+            filename = os.path.expanduser(filename)
+            tmpfilename = filename + ".tmp"
+            with open(tmpfilename, 'w') as file:
+                file.write(text())
+            os.replace(tmpfilename, filename)
+        return (summary)
@@ -0,0 +1,560 @@
+#!/usr/bin/python
+
+import argparse,json,random,threading,time,zlib
+from http.server import ThreadingHTTPServer,BaseHTTPRequestHandler
+from urllib.parse import urlparse,parse_qs,unquote
+
+class classMockFleet():
+    """
+    This class is a generated NetBrain inventory and its Cisco EOX answers.
+    Every device, module and EOX record is derived from the device index and the seed, so nothing is stored
+    and any fleet size gives the same answers on every run.  Only uploaded EOL attributes are kept.
+    """
+
+    #(vendor, subTypeName, model, stack module type) picked by device index
+    models = (
+        ("Cisco", "Cisco IOS Switch", "WS-C3850-48P", "WS-C3850-48P"),
+        ("Cisco", "Cisco IOS XE Switch", "C9300-48P", "C9300-48P"),
+        ("Cisco", "Cisco Router", "ISR4331/K9", "ISR4331/K9"),
+        ("Cisco", "Cisco Nexus Switch", "N9K-C93180YC-EX", "N9K-C93180YC-EX"),
+        ("Cisco", "Cisco IOS Switch", "WS-C2960X-48FPD-L", "WS-C2960X-48FPD-L"),
+        ("Cisco", "Cisco WLC", "AIR-CT5520-K9", "AIR-CT5520-K9"),
+        ("Cisco", "Cisco IOS XE Switch", "C9500-24Y4C", "C9500-24Y4C"),
+        ("Cisco", "Cisco Router", "ISR4451-X/K9", "ISR4451-X/K9"),
+        ("Juniper", "Juniper EX Switch", "EX4300-48T", "EX4300-48T"),
+        ("Palo Alto Networks", "Palo Alto Firewall", "PA-3220", "PA-3220"),
+    )
+    optics = ("GLC-LH-SMD", "SFP-10G-SR", "SFP-10G-LR", "QSFP-40G-SR4")
+    discoverytime = "2024-01-15T07:08:35Z"
+
+    def __init__(self, devices=1000, seed=0):
+        """
+        Inputs:
+            - devices - number of devices in the fleet
+            - seed - changes the generated serial answers
+        """
+        self.devices = devices
+        self.seed = seed
+        self.lock = threading.Lock()
+        #(hostname, moduleName): value of every EOL attribute set through the PUT endpoints
+        self.eol = {}
+        #product IDs the EOX API knows
+        self.ciscopids = {i for vendor, subtype, model, stacktype in self.models if vendor == "Cisco" for i in (model, stacktype)}
+        self.ciscopids.update(self.optics + ("PWR-C1-715WAC", "PWR-C1-1100WAC", "FAN-T1"))
+
+    def get_index(self, hostname):
+        """
+        Outputs:
+            - device index of a generated hostname, or None
+        """
+        try:
+            index = int(hostname[2:])
+        except (TypeError, ValueError):
+            return (None)
+        if hostname[:2] != "sw" or not 0 <= index < self.devices:
+            return (None)
+        return (index)
+
+    def get_device(self, index, fullattr=True):
+        """
+        Outputs:
+            - device dictionary as returned by V1/CMDB/Devices
+        """
+        vendor, subtype, model, stacktype = self.models[index % len(self.models)]
+        hostname = "sw%06d" % index
+        device = {
+            "id": "00000000-0000-4000-8000-%012d" % index,
+            "name": hostname,
+            "mgmtIP": "10.%d.%d.%d" % (index >> 16 & 255, index >> 8 & 255, index & 255),
+            "mgmtIntf": "Vlan100",
+            "subTypeName": subtype,
+            "vendor": vendor,
+            "model": model,
+            "ver": "17.9.4",
+            "sn": "FOC%08d" % index,
+            "site": "My Network\\Region%d\\Site%03d" % (index % 5, index % 200),
+            "loc": "",
+            "contact": "",
+            "mem": "8589934592",
+            "assetTag": "",
+            "layer": "L2",
+            "descr": "Cisco IOS Software, Catalyst L3 Switch Software",
+            "oid": "1.3.6.1.4.1.9.1.2066",
+            "driverName": subtype,
+            "fDiscoveryTime": "2021-03-02T11:20:00Z",
+            "lDiscoveryTime": self.discoverytime,
+            "assignTags": [],
+        }
+        #custom attributes are only returned with fullattr=1
+        if fullattr:
+            device["deviceeol"] = self.eol.get((hostname, ""), "")
+            device["hasBGPConfig"] = index % 3 == 0
+            device["hasOSPFConfig"] = index % 2 == 0
+            device["bootTime"] = "2024-01-01T00:00:00Z"
+        return (device)
+
+    def get_modules(self, index):
+        """
+        Outputs:
+            - module attributes of a device as returned by V1/CMDB/Modules/Attributes, keyed by module name
+        """
+        hostname = "sw%06d" % index
+        stacktype = self.models[index % len(self.models)][3]
+        modules = [
+            ("Switch 1", stacktype, "FOC%08d" % index),
+            ("Switch 1 - Power Supply A", "PWR-C1-715WAC", "LIT%08d" % index),
+        ]
+        #a second stack member on every fourth device
+        if index % 4 == 0:
+            modules.append(("Switch 2", stacktype, "FOC%08dB" % index))
+        #optics, some of which don't report a serial
+        for port in range(1 + index % 3):
+            sn = "AGA%08d%d" % (index, port) if (index + port) % 7 else "N/A"
+            modules.append(("GigabitEthernet1/1/%d" % (port + 1), self.optics[(index + port) % len(self.optics)], sn))
+        #power supplies with two comma separated serials and a module showing the label of its serial
+        if index % 5 == 0:
+            modules.append(("Power Supply 2", "PWR-C1-1100WAC", "LIT%08dC,LIT%08dD" % (index, index)))
+        if index % 9 == 0:
+            modules.append(("Fan Tray", "FAN-T1", "Serial: FOC%08dF" % index))
+        #a duplicated CMDB entry reporting the chassis serial of the next device
+        if index % 13 == 0 and index + 1 < self.devices:
+            modules.append(("Supervisor", stacktype, "FOC%08d" % (index + 1)))
+        attributes = {}
+        for name, moduletype, sn in modules:
+            attributes[name] = {
+                "name": name,
+                "type": moduletype,
+                "sn": sn,
+                "descr": moduletype,
+                "hwrev": "V0%d" % (1 + index % 4),
+                "moduleeol": self.eol.get((hostname, name), ""),
+            }
+        return (attributes)
+
+    def get_pid(self, serial):
+        """
+        Outputs:
+            - product ID of a generated serial, or None
+        """
+        try:
+            index = int(serial[3:11])
+        except ValueError:
+            return (None)
+        if not 0 <= index < self.devices:
+            return (None)
+        prefix, suffix = serial[:3], serial[11:]
+        vendor, subtype, model, stacktype = self.models[index % len(self.models)]
+        if prefix == "FOC":
+            return ({"": model, "B": stacktype, "F": "FAN-T1"}.get(suffix))
+        if prefix == "LIT":
+            return ({"": "PWR-C1-715WAC", "C": "PWR-C1-1100WAC", "D": "PWR-C1-1100WAC"}.get(suffix))
+        if prefix == "AGA" and suffix.isdigit():
+            return (self.optics[(index + int(suffix)) % len(self.optics)])
+        return (None)
+
+    def get_record(self, inputtype, inputvalue):
+        """
+        Outputs:
+            - blank EOXRecord
+        """
+        return ({
+            "EOLProductID": "",
+            "ProductIDDescription": "",
+            "EOXExternalAnnouncementDate": {"value": "", "dateFormat": "YYYY-MM-DD"},
+            "EndOfSaleDate": {"value": "", "dateFormat": "YYYY-MM-DD"},
+            "LastDateOfSupport": {"value": "", "dateFormat": "YYYY-MM-DD"},
+            "EOXInputType": inputtype,
+            "EOXInputValue": inputvalue,
+        })
+
+    def get_pid_eox(self, pid, inputtype="ShowEOXByProductID", inputvalue=None):
+        """
+        Outputs:
+            - EOXRecord entries of one product ID.  About 60% of the Cisco product IDs are announced and the rest
+              Not Announced.  Product IDs of other vendors get the same answer as Not Announced, like they do from
+              Cisco.  QSFP-40G-SR4 has two bulletins with different dates
+        """
+        bucket = zlib.crc32((pid + str(self.seed)).encode()) % 20
+        if pid not in self.ciscopids or bucket >= 12:
+            record = self.get_record(inputtype, inputvalue or pid)
+            record["EOXError"] = {"ErrorID": "SSA_ERR_026", "ErrorDescription": "EOX information does not exist for the following product ID(s): " + pid, "ErrorDataType": "PRODUCT_ID", "ErrorDataValue": pid}
+            return ([record])
+        records = []
+        for year in ((25 + bucket % 10, 27 + bucket % 10) if pid == "QSFP-40G-SR4" else (25 + bucket % 10,)):
+            record = self.get_record(inputtype, inputvalue or pid)
+            record["EOLProductID"] = pid
+            record["ProductIDDescription"] = pid + " End-of-Sale and End-of-Life Announcement"
+            record["EOXExternalAnnouncementDate"]["value"] = "2019-10-31"
+            record["EndOfSaleDate"]["value"] = "2020-10-30"
+            record["LastDateOfSupport"]["value"] = "20%d-10-31" % year
+            records.append(record)
+        return (records)
+
+    def get_eox(self, serial):
+        """
+        Outputs:
+            - EOXRecord of one serial.  About one serial in seven is not found, the others get the record of their
+              product ID
+        """
+        bucket = zlib.crc32((serial + str(self.seed)).encode()) % 20
+        pid = self.get_pid(serial)
+        if pid not in self.ciscopids or bucket >= 17:
+            record = self.get_record("ShowEOXBySerialNumber", serial)
+            record["EOXError"] = {"ErrorID": "SSA_ERR_015", "ErrorDescription": "Serial number not found", "ErrorDataType": "SERIAL_NUMBER", "ErrorDataValue": serial}
+            return (record)
+        if bucket == 16:
+            record = self.get_record("ShowEOXBySerialNumber", serial)
+            record["EOXError"] = {"ErrorID": "SSA_ERR_026", "ErrorDescription": "EOX information does not exist for the following product ID(s): ", "ErrorDataType": "PRODUCT_ID", "ErrorDataValue": ""}
+            return (record)
+        #a serial of a product ID with several bulletins belongs to one of them
+        records = self.get_pid_eox(pid, "ShowEOXBySerialNumber", serial)
+        return (records[bucket % len(records)])
+
+    def set_eol(self, hostname, moduleName, value):
+        """
+        Keeps an uploaded EOL attribute so the next inventory returns it.
+        Outputs:
+            - True if the device exists
+        """
+        if self.get_index(hostname) is None:
+            return (False)
+        with self.lock:
+            self.eol[(hostname, moduleName)] = value
+        return (True)
+
+class classMockServer(ThreadingHTTPServer):
+    """
+    This class is a local stand-in for NetBrain RestAPI, the Cisco OAuth token endpoint and Cisco Support EOX API.
+    All three are served from one port under the same paths as the real services, so the script is pointed at it with
+        NETBRAIN_BASE_URL="http://127.0.0.1:port/ServicesAPI/API/"
+        CISCOEOL_BASE_URL="http://127.0.0.1:port/supporttools/eox/rest/5/"
+        CISCOEOL_TOKEN_URL="http://127.0.0.1:port/oauth2/default/v1/token"
+    Request counts per endpoint and status are served as json on /_stats.
+    """
+    daemon_threads = True
+    #a pooled client keeps up to max_workers connections open, make sure none of them are refused
+    request_queue_size = 128
+
+    netbrain_path = "/ServicesAPI/API/"
+    eox_path = "/supporttools/eox/rest/5/"
+    token_path = "/oauth2/default/v1/token"
+
+    def __init__(self, address=("127.0.0.1", 0), devices=1000, latency=0.0, jitter=0.0, error_rate=0.0,
+            rate_429=0.0, retry_after=1, token_lifetime=3600, max_serials=20,
+            max_url_length=0, reject_rate=0.0, seed=0):
+        """
+        Inputs:
+            - address - (host, port) to listen on, port 0 picks a free one
+            - devices - fleet size
+            - latency, jitter - seconds added to every call, jitter is a random extra up to that many seconds
+            - error_rate - share of data calls answered with 503
+            - rate_429 - share of EOX calls answered with 429 and a Retry-After of retry_after seconds
+            - token_lifetime - seconds a token is accepted.  Cisco tokens report it as expires_in
+            - max_serials - serials allowed per EOX call, more are answered with 400
+            - max_url_length - characters allowed in an EOX url, longer ones are answered with 414.  0 for no limit
+            - reject_rate - share of serials that fail every EOX call they are part of with a 500, like malformed
+              CMDB entries do
+            - seed - changes the generated serial answers and the random errors
+        """
+        super().__init__(address, classMockHandler)
+        self.fleet = classMockFleet(devices, seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.token_lifetime = token_lifetime
+        self.max_serials = max_serials
+        self.max_url_length = max_url_length
+        self.reject_rate = reject_rate
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        #token: expiry time of every token handed out
+        self.tokens = {}
+        self.stats = {"requests": 0, "bytes": 0, "endpoints": {}, "statuses": {}}
+
+    def get_url(self):
+        """
+        Outputs:
+            - base url of the server
+        """
+        host, port = self.server_address[:2]
+        return ("http://%s:%d" % (host, port))
+
+    def get_env(self):
+        """
+        Outputs:
+            - dictionary of the environment variables that point the script at this server
+        """
+        url = self.get_url()
+        return ({
+            "NETBRAIN_BASE_URL": url + self.netbrain_path,
+            "CISCOEOL_BASE_URL": url + self.eox_path,
+            "CISCOEOL_TOKEN_URL": url + self.token_path,
+        })
+
+    def new_token(self, prefix):
+        """
+        Outputs:
+            - a new token accepted for token_lifetime seconds
+        """
+        with self.lock:
+            token = "%s%d%08x" % (prefix, len(self.tokens), self.random.getrandbits(32))
+            self.tokens[token] = time.monotonic() + self.token_lifetime
+        return (token)
+
+    def check_token(self, token):
+        """
+        Outputs:
+            - True if the token was handed out and has not expired or been logged out
+        """
+        expiry = self.tokens.get(token)
+        return (expiry is not None and expiry > time.monotonic())
+
+    def is_rejected(self, serial):
+        """
+        Outputs:
+            - True if the serial is one of the reject_rate share that always fails, the same ones on every call
+        """
+        return (bool(self.reject_rate) and zlib.crc32(("%d:%s" % (self.seed, serial)).encode()) % 10000 < self.reject_rate * 10000)
+
+    def roll(self, rate):
+        """
+        Outputs:
+            - True for a share of rate of the calls
+        """
+        if not rate:
+            return (False)
+        with self.lock:
+            return (self.random.random() < rate)
+
+    def count(self, endpoint, status, size):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += size
+            self.stats["endpoints"][endpoint] = self.stats["endpoints"].get(endpoint, 0) + 1
+            self.stats["statuses"][str(status)] = self.stats["statuses"].get(str(status), 0) + 1
+
+class classMockHandler(BaseHTTPRequestHandler):
+    """
+    This class answers the calls made by classNetbrain and classCiscoSupport.
+    """
+    protocol_version = "HTTP/1.1"
+    #headers and body are written separately, don't let Nagle hold back the body on keep-alive connections
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body, endpoint, headers=None):
+        """
+        Sends a json response and counts it.
+        """
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        if endpoint:
+            self.server.count(endpoint, status, len(data))
+
+    def read_body(self):
+        """
+        Outputs:
+            - json body of the request, empty if there is none
+        """
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        try:
+            return (json.loads(data) if data else {})
+        except ValueError:
+            return ({})
+
+    def wait(self):
+        server = self.server
+        delay = server.latency
+        if server.jitter:
+            with server.lock:
+                delay = delay + server.random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def route(self, method):
+        """
+        Finds the endpoint of a call.
+        Outputs:
+            - (endpoint, path remainder, query)
+        """
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        for prefix, name in ((self.server.netbrain_path, "netbrain"), (self.server.eox_path, "eox")):
+            if url.path.startswith(prefix):
+                rest = url.path[len(prefix):]
+                if name == "eox" and rest.startswith(("EOXBySerialNumber/", "EOXByProductID/")):
+                    return (method + " " + rest.split("/")[0], rest, query)
+                return (method + " " + rest, rest, query)
+        return (method + " " + url.path, url.path, query)
+
+    def do_GET(self):
+        endpoint, rest, query = self.route("GET")
+        if rest == "/_stats":
+            with self.server.lock:
+                stats = json.loads(json.dumps(self.server.stats))
+            return (self.send(200, stats, None))
+        self.wait()
+        if endpoint == "GET V1/CMDB/Devices":
+            return (self.get_devices(endpoint, query))
+        if endpoint == "GET V1/CMDB/Modules/Attributes":
+            return (self.get_modules(endpoint, query))
+        if endpoint in ("GET EOXBySerialNumber", "GET EOXByProductID"):
+            return (self.get_eox(endpoint, rest))
+        self.send(404, {"statusCode": 404, "statusDescription": "Not found"}, endpoint)
+
+    def do_POST(self):
+        endpoint, rest, query = self.route("POST")
+        self.read_body()
+        self.wait()
+        if endpoint == "POST V1/Session":
+            return (self.send(200, {"token": self.server.new_token("nb"), "statusCode": 790200, "statusDescription": "Success."}, endpoint))
+        if rest == self.server.token_path:
+            if not query.get("client_id") or not query.get("client_secret"):
+                return (self.send(401, {"error": "invalid_client"}, endpoint))
+            return (self.send(200, {"token_type": "Bearer", "expires_in": self.server.token_lifetime,
+                "access_token": self.server.new_token("cs"), "scope": "api_access"}, endpoint))
+        self.send(404, {"statusCode": 404, "statusDescription": "Not found"}, endpoint)
+
+    def do_PUT(self):
+        endpoint, rest, query = self.route("PUT")
+        body = self.read_body()
+        self.wait()
+        if endpoint == "PUT V1/Session/CurrentDomain":
+            if not self.server.check_token(self.headers.get("Token")):
+                return (self.send(401, {"statusCode": 795000, "statusDescription": "Token is invalid."}, endpoint))
+            return (self.send(200, {"statusCode": 790200, "statusDescription": "Success."}, endpoint))
+        if endpoint in ("PUT V1/CMDB/Devices/Attributes", "PUT V1/CMDB/Modules/Attributes"):
+            if not self.check_netbrain(endpoint):
+                return
+            if not self.server.fleet.set_eol(body.get("hostname"), body.get("moduleName", ""), body.get("attributeValue")):
+                return (self.send(200, {"statusCode": 791000, "statusDescription": "Device does not exist."}, endpoint))
+            return (self.send(200, {"statusCode": 790200, "statusDescription": "Success."}, endpoint))
+        self.send(404, {"statusCode": 404, "statusDescription": "Not found"}, endpoint)
+
+    def do_DELETE(self):
+        endpoint, rest, query = self.route("DELETE")
+        body = self.read_body()
+        if endpoint == "DELETE V1/Session":
+            with self.server.lock:
+                self.server.tokens.pop(body.get("token"), None)
+            return (self.send(200, {"statusCode": 790200, "statusDescription": "Success."}, endpoint))
+        self.send(404, {"statusCode": 404, "statusDescription": "Not found"}, endpoint)
+
+    def check_netbrain(self, endpoint):
+        """
+        Answers calls without a valid token with 401 and a share of the calls with 503.
+        Outputs:
+            - True if the call should be answered
+        """
+        if not self.server.check_token(self.headers.get("Token")):
+            self.send(401, {"statusCode": 795000, "statusDescription": "Token is invalid."}, endpoint)
+            return (False)
+        if self.server.roll(self.server.error_rate):
+            self.send(503, {"statusCode": 503, "statusDescription": "Service Unavailable"}, endpoint)
+            return (False)
+        return (True)
+
+    def get_devices(self, endpoint, query):
+        if not self.check_netbrain(endpoint):
+            return
+        fleet = self.server.fleet
+        skip = int(query.get("skip", 0))
+        fullattr = query.get("fullattr", "0") not in ("0", "false", "False")
+        #NetBrain returns at most 50 devices per page
+        devices = [fleet.get_device(i, fullattr) for i in range(skip, min(skip + 50, fleet.devices))]
+        self.send(200, {"devices": devices, "statusCode": 790200, "statusDescription": "Success."}, endpoint)
+
+    def get_modules(self, endpoint, query):
+        if not self.check_netbrain(endpoint):
+            return
+        hostname = query.get("hostname")
+        index = self.server.fleet.get_index(hostname)
+        if index is None:
+            return (self.send(200, {"statusCode": 791000, "statusDescription": "Device does not exist."}, endpoint))
+        self.send(200, {"hostname": hostname, "attributes": self.server.fleet.get_modules(index),
+            "statusCode": 790200, "statusDescription": "Success."}, endpoint)
+
+    def get_eox(self, endpoint, rest):
+        server = self.server
+        authorization = self.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer ") or not server.check_token(authorization[len("Bearer "):]):
+            return (self.send(401, {"error": "invalid_token"}, endpoint))
+        if server.roll(server.rate_429):
+            return (self.send(429, {"ErrorResponse": {"APIError": {"ErrorDescription": "Too many requests"}}}, endpoint,
+                {"Retry-After": str(server.retry_after)}))
+        if server.roll(server.error_rate):
+            return (self.send(503, {"ErrorResponse": {"APIError": {"ErrorDescription": "Service Unavailable"}}}, endpoint))
+        #EOXBySerialNumber/{page}/{comma separated serials} or EOXByProductID/{page}/{comma separated product IDs}
+        parts = rest.split("/", 2)
+        serials = [unquote(serial) for serial in (parts[2] if len(parts) > 2 else "").split(",") if serial]
+        if server.max_url_length and len(self.path) > server.max_url_length:
+            return (self.send(414, {"ErrorResponse": {"APIError": {"ErrorDescription": "URI Too Long"}}}, endpoint))
+        if not serials or len(serials) > server.max_serials:
+            return (self.send(400, {"ErrorResponse": {"APIError": {"ErrorID": "SSA_ERR_001",
+                "ErrorDescription": "Between 1 and %d serial numbers are allowed" % server.max_serials}}}, endpoint))
+        rejected = [serial for serial in serials if server.is_rejected(serial)]
+        if rejected:
+            return (self.send(500, {"ErrorResponse": {"APIError": {"ErrorDescription": "Internal error"}}}, endpoint))
+        if endpoint == "GET EOXByProductID":
+            records = [record for pid in serials for record in server.fleet.get_pid_eox(pid)]
+        else:
+            records = [server.fleet.get_eox(serial) for serial in serials]
+        self.send(200, {"PaginationResponseRecord": {"PageIndex": 1, "LastIndex": 1, "TotalRecords": len(records),
+            "PageRecords": len(records)}, "EOXRecord": records}, endpoint)
+
+def start(**options):
+    """
+    Starts a mock server on a background thread.
+    Inputs:
+        - options - see classMockServer
+    Outputs:
+        - server.  Call server.shutdown() to stop it
+    """
+    server = classMockServer(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return (server)
+
+def get_options(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the NetBrain and Cisco Support EOX APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--devices", type=int, default=1000, help="fleet size")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra seconds added to every call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of data calls answered with 503")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of EOX calls answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--token-lifetime", type=int, default=3600, help="seconds a token is accepted")
+    parser.add_argument("--max-serials", type=int, default=20, help="serials allowed per EOX call")
+    parser.add_argument("--max-url-length", type=int, default=0, help="characters allowed in an EOX url, 0 for no limit")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="share of serials that always fail their EOX call")
+    parser.add_argument("--seed", type=int, default=0)
+    return (parser.parse_args(argv))
+
+#Begin the Work
+if __name__ == "__main__":
+    options = get_options()
+    server = classMockServer((options.host, options.port), devices=options.devices, latency=options.latency,
+        jitter=options.jitter, error_rate=options.error_rate, rate_429=options.rate_429, retry_after=options.retry_after,
+        token_lifetime=options.token_lifetime, max_serials=options.max_serials,
+        max_url_length=options.max_url_length, reject_rate=options.reject_rate, seed=options.seed)
+    print ("Serving %d devices on %s, point the script at it with:" % (options.devices, server.get_url()))
+    for key, value in server.get_env().items():
+        print ('%s="%s"' % (key, value))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
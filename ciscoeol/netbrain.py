@@ -0,0 +1,670 @@
+import json,os
+from concurrent.futures import ThreadPoolExecutor
+from .config import classSetting
+from .console import Fore,Style
+from .inventory import classInventory
+from .report import classReport
+from .transport import classToken,classTransport
+
+class classNetbrain():
+    """
+    This class is used to perform all functions from within NetBrain RestAPI.
+    The restAPI user and URL are hard coded in the env file and used in many functions.
+    """
+    #set NetBrain login information from environment variable file
+    user = classSetting('NETBRAIN_USER')
+    pwd = classSetting('NETBRAIN_PASSWORD')
+    authentication_id = classSetting('NETBRAIN_AUTHENTICATION_ID')
+    tenant = classSetting('NETBRAIN_TENANT')
+    domain = classSetting('NETBRAIN_DOMAIN')
+    server_url = classSetting('NETBRAIN_BASE_URL')
+    eolreportfilename = classSetting('CISCOEOL_REPORT')
+    #number of module attribute calls kept in flight at once
+    max_workers = classSetting('NETBRAIN_MAX_WORKERS', 8, int)
+    #optional inventory snapshot used to skip the module call of devices that were not rediscovered
+    snapshotfilename = classSetting('NETBRAIN_INVENTORY_SNAPSHOT')
+    #seconds a NetBrain token is used before a new one is requested. 0 only renews it after a 401
+    token_lifetime = classSetting('NETBRAIN_TOKEN_LIFETIME', 0.0, float)
+
+    #device attributes NetBrain returns without fullattr.  Custom attributes such as deviceeol need fullattr=1
+    basic_fields = (
+        "id", "name", "mgmtIP", "mgmtIntf", "subTypeName", "vendor", "model", "ver", "sn", "site", "loc", "contact",
+        "mem", "assetTag", "layer", "descr", "oid", "driverName", "fDiscoveryTime", "lDiscoveryTime", "assignTags",
+    )
+    #device attributes that are always kept when projecting, they are needed for the module call and the snapshot
+    required_fields = ("id", "name", "lDiscoveryTime")
+    #the attributes the EOL check reads from the inventory.  model and type are the product IDs of the PID lookup,
+    #vendor, subTypeName and site are read by classFilter
+    eol_fields = ("name", "sn", "model", "vendor", "subTypeName", "site", "deviceeol")
+    eol_module_fields = ("name", "sn", "type", "moduleeol")
+
+    def __init__(self, tenant=None, domain=None, snapshotfilename=None):
+        """
+        Runs every call to class NetBrain.  Includes get_headers() and the token manager.
+        Inputs:
+            - tenant, domain - work in this tenant and domain instead of NETBRAIN_TENANT and NETBRAIN_DOMAIN
+            - snapshotfilename - use this inventory snapshot instead of NETBRAIN_INVENTORY_SNAPSHOT
+        Outputs:
+            - headers
+        """
+        if tenant is not None:
+            self.tenant = tenant
+        if domain is not None:
+            self.domain = domain
+        if snapshotfilename is not None:
+            self.snapshotfilename = snapshotfilename
+        #Every call needs a token and a domain set.  The token manager logs in with login() on first use
+        #and again whenever the token expires, and is shared by all concurrent calls
+        self.tokenmanager = classToken(self.login)
+        #Every call shares one pooled session sized to the number of concurrent module calls
+        self.session = classTransport(pool_size=self.max_workers + 1, token=self.tokenmanager, header="Token")
+        #Every call will need headers
+        self.headers = self.get_headers()
+
+    def get_headers(self):
+        """
+        Creates the login headers for NetBrain RestAPI.
+        Inputs: 
+        Outputs:
+            - headers
+        """
+        #Set restAPI header information into dictionary
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            }
+
+        return (headers)
+    
+    def login(self):
+        """
+        Logs in to NetBrain RestAPI and sets the domain of the new session.  Used by the token manager.
+        Inputs:
+            - username
+            - password
+            - authentication_id
+            - tenant: NetBrain tenant
+            - domain: NetBrain domain
+        Outputs:
+            - (token, lifetime), or an error string
+        """
+        #set url
+        url = self.server_url + "V1/Session"
+        
+        #Set data.  Authentication_id is required for external (TACACS) users only
+        data = {
+            "username": self.user,
+            "password": self.pwd,
+            "authentication_id": self.authentication_id
+        }
+        #run api call
+        try:
+            resp = self.session.post(url,data=json.dumps(data),headers=self.get_headers(), verify=True, auth=False)
+            #check for HTTP codes other than 200
+            if resp.status_code != 200:
+                return (f'Get token failed! - {str(resp.text)}')
+            #find the token index
+            token = resp.json()["token"]
+
+            #a new session has no domain, so set it before the token is handed out
+            headers = self.get_headers()
+            headers["Token"] = token
+            data = {
+                "tenantId": self.tenant,
+                "domainId": self.domain
+            }
+            resp = self.session.put(self.server_url + "V1/Session/CurrentDomain",data=json.dumps(data),headers=headers, verify=True, auth=False)
+            if resp.status_code != 200:
+                return ("Login failed! -" + str(resp.text))
+            return ((token, self.token_lifetime))
+        except Exception as e:
+            return (str(e))
+
+    def get_token(self):
+        """
+        Retrieves a token for NetBrain RestAPI through the token manager.
+        Inputs:
+        Outputs:
+            - token
+        """
+        try:
+            token = self.tokenmanager.refresh()
+            #place token in the headers
+            self.headers["Token"] = token
+            print(f'{Fore.CYAN}I GOT A NETBRAIN TOKEN!!!{Fore.RESET}')
+            return (token)
+        except Exception as e:
+            return (str(e))
+        
+    def set_domain(self):
+        """
+        Retrieves a token for NetBrain RestAPI.
+        Inputs:
+            - tenant: NetBrain tenant
+            - domain: NetBrain domain
+            - token
+        Outputs:
+        """
+        #set url
+        url = self.server_url + "V1/Session/CurrentDomain"
+        
+        #set data
+        data = {
+            "tenantId": self.tenant,
+            "domainId": self.domain
+        }
+    
+        #run api call
+        try:
+            resp = self.session.put(url,data=json.dumps(data),headers=self.headers, verify=True)
+            #check for HTTP codes other than 200
+            if resp.status_code == 200:
+                pass
+                #result = resp.json()
+            else:
+                return ("Login failed! -" + str(resp.text))
+        except Exception as e:
+            return(str(e))
+            
+    def logout(self):
+        """
+        Ensure you logout of each session.  Once you logout you will need a new token.
+        Inputs:
+            - token
+        Outputs:
+        """
+        #set url
+        url= self.server_url + "V1/Session"
+        try:
+            #without a session there is nothing to log out of, and logging in just to log out would hide the login error
+            token = self.tokenmanager.token
+            if token is None:
+                return
+            data = {
+                "token": token
+            }
+            resp = self.session.delete(url,data=json.dumps(data),headers=self.headers, verify=True)
+            #the token is no longer valid
+            self.tokenmanager.invalidate()
+            #check for HTTP codes other than 200
+            if resp.status_code == 200:
+                print(f'{Fore.CYAN}I LOGGED OUT OF NETBRAIN!!!{Fore.RESET}')
+                return (resp.text)
+            else:
+                print ("Session logout failed! -" + str(resp.text))
+        except Exception as e:
+            return(str(e))
+    
+    def get_device_page(self, skip, fields=None):
+        """
+        Gets one page of successfully discovered devices and attributes
+        Inputs:
+            - skip - number of records to skip
+            - fields - device attributes to keep, None keeps all of them
+        Outputs:
+            - result - list of device dictionaries, or an error string
+        """
+        #set the url for device and attributes
+        deviceurl = self.server_url + "V1/CMDB/Devices"
+        #only ask for the full attribute set if a requested attribute is not part of the basic set
+        fullattr = 1
+        if fields is not None:
+            fields = set(fields) | set(self.required_fields)
+            if fields <= set(self.basic_fields):
+                fullattr = 0
+        #required parameters
+        data = {
+            "version": 1,
+            "skip": skip,
+            "fullattr": fullattr
+        }
+        #run the main device query API calls
+        resp = self.session.get(deviceurl, params=data, headers=self.headers, verify=True)
+        #Check for HTTP code other than 200. If 200 then proceed
+        if resp.status_code == 200:
+            #set the result at the root index of devices.  All attributes are under this index
+            result = resp.json()['devices']
+            #drop the attributes that were not asked for before they are kept anywhere
+            if fields is not None:
+                result = [{key: value for key, value in device.items() if key in fields} for device in result]
+            return (result)
+        #if HTTP code for devices is not 200
+        else:
+            result = "Get Devices Failed - Status Code: " + str(resp.status_code) + ", Response: " + str(resp.text)
+            return (result)
+
+    def get_device_modules(self, device, fields=None):
+        """
+        Gets the module attributes of a single device and adds them to the device dictionary
+        Inputs:
+            - device - device dictionary from get_device_page()
+            - fields - module attributes to keep, None keeps all of them
+        Outputs:
+            - result - the updated device dictionary, or an error string
+        """
+        #set the url for module attributes
+        moduleurl = self.server_url + "V1/CMDB/Modules/Attributes"
+        #define parameters for module attribute API call. hostname is required
+        data = {
+            "hostname": device['name']
+        }
+        #run the module attribute API calls
+        resp = self.session.get(moduleurl, params=data, headers=self.headers, verify=True)
+        #Check for HTTP code other than 200. If 200 then proceed
+        if resp.status_code == 200:
+            #create a variable named result
+            result = resp.json()
+            #if the attribute index exists, then proceed
+            if result.get('attributes'):
+                #exclude hostname index while cycling through results. This isn't needed
+                #but the attributes root key needs to be preserved in the json
+                result.pop("hostname", None)
+                #drop the module attributes that were not asked for
+                if fields is not None:
+                    result['attributes'] = {
+                        name: {key: value for key, value in module.items() if key in fields}
+                        for name, module in result['attributes'].items()
+                    }
+                #update the previous json with the module attribute json output
+                #this will add the "attributes" key to the existing dictionary above it
+                device.update(result)
+            #if there are no attributes for the device then return just the device
+            return (device)
+        #if HTTP code for module attributes is not 200
+        else:
+            result = "Get Devices Failed - Status Code: " + str(resp.status_code) + ", Response: " + str(resp.text)
+            return (result)
+
+    def load_snapshot(self, snapshotfilename=None):
+        """
+        Loads the inventory snapshot saved by the previous run.
+        Inputs:
+            - snapshotfilename - snapshot to load instead of snapshotfilename
+        Outputs:
+            - snapshot - dictionary of device id: {"name", "lDiscoveryTime", "attributes"}, empty if there is none
+        """
+        snapshotfilename = snapshotfilename or self.snapshotfilename
+        if not snapshotfilename or not os.path.isfile(snapshotfilename):
+            return ({})
+        with open(snapshotfilename, 'r') as file:
+            return (json.load(file))
+
+    def save_snapshot(self, snapshot, snapshotfilename=None):
+        """
+        Saves the inventory snapshot.  The file is replaced in one step so a failed run never leaves half a snapshot.
+        Inputs:
+            - snapshot - dictionary of device id: {"name", "lDiscoveryTime", "attributes"}
+            - snapshotfilename - snapshot to save instead of snapshotfilename
+        """
+        snapshotfilename = snapshotfilename or self.snapshotfilename
+        tmpfilename = snapshotfilename + ".tmp"
+        with open(tmpfilename, 'w') as file:
+            json.dump(snapshot, file)
+        os.replace(tmpfilename, snapshotfilename)
+
+    def update_snapshot(self, uploaded, snapshotfilename=None):
+        """
+        Writes uploaded module EOL values into the snapshot, since reused module attributes are not re-read from NetBrain.
+        Inputs:
+            - uploaded - list of (hostname, moduleName, attributeValue) that were set successfully
+            - snapshotfilename - snapshot to update instead of snapshotfilename, for example the snapshot of a shard
+        """
+        snapshot = self.load_snapshot(snapshotfilename)
+        if not snapshot:
+            return
+        byname = {entry['name']: entry for entry in snapshot.values()}
+        for hostname, moduleName, attributeValue in uploaded:
+            entry = byname.get(hostname)
+            if moduleName and entry and moduleName in entry.get('attributes', {}):
+                entry['attributes'][moduleName]['moduleeol'] = attributeValue
+        self.save_snapshot(snapshot, snapshotfilename)
+
+    def get_all_devices_and_attributes(self, max_workers=None, incremental=None, outputfilename=None, fields=None, modulefields=None,
+            checkpoint=None, start=0, stride=1, onpage=None, devicefilter=None):
+        """
+        Gets a list of all successfully discovered devices and attributes
+        Inputs:
+            - headers
+            - max_workers - number of module calls kept in flight (defaults to NETBRAIN_MAX_WORKERS)
+            - incremental - reuse the module attributes of devices that were not rediscovered since the last
+              snapshot (defaults to True when NETBRAIN_INVENTORY_SNAPSHOT is set)
+            - outputfilename - stream the devices to this file as JSON Lines while the pages arrive instead of
+              building the whole list in memory
+            - fields - device attributes to keep, for example eol_fields.  None keeps all of them
+            - modulefields - module attributes to keep, for example eol_module_fields.  None keeps all of them
+            - checkpoint - classCheckpoint recording each page written to outputfilename, so a rerun resumes
+              after the last completed page
+            - start, stride - only fetch every stride-th page of 50 devices beginning with page start.  Used to
+              split one domain across several processes
+            - onpage - called with the list of devices of every page once its modules are in, so later stages can
+              start on it while the next pages are fetched.  A call that blocks holds back the paging
+            - devicefilter - classFilter.  The devices it drops get no module call and are left out of the result
+        Outputs: 
+            - result - json output of devices and attributes, or the number of devices written to outputfilename
+        """
+        #create a list to append json output
+        rawList = []
+        devicecount = 0
+        #set the number of concurrent module calls
+        if max_workers is None:
+            max_workers = self.max_workers
+        if incremental is None:
+            incremental = bool(self.snapshotfilename)
+        #the previous snapshot is only read in incremental mode, but a new one is saved whenever a filename is set
+        snapshot = self.load_snapshot() if incremental else {}
+        newsnapshot = {}
+        reused = 0
+        filtered = 0
+        metrics = self.session.metrics
+
+        skip = 50 * start
+        count = 50
+        offset = None
+        #pick up where an interrupted run stopped.  Only a streamed inventory can be resumed
+        if checkpoint and outputfilename:
+            filename = os.path.abspath(os.path.expanduser(outputfilename))
+            try:
+                resume = checkpoint.completed('inventory')
+                #the journal only applies to the inventory file it was written for, and only while that file holds the
+                #pages it recorded.  Otherwise the inventory and everything built on it is started over
+                for entry in resume.values():
+                    if entry.get('filename') != filename or not os.path.isfile(filename) or \
+                            ('offset' in entry and os.path.getsize(filename) < entry['offset']):
+                        print (f'{Fore.YELLOW}Checkpoint does not match inventory {filename}, starting over{Fore.RESET}')
+                        checkpoint.reset('inventory')
+                        resume = {}
+                        break
+                if 'done' in resume:
+                    print (f'{Fore.YELLOW}Inventory already complete, skipping{Fore.RESET}')
+                    return (resume['done']['count'])
+                if 'page' in resume:
+                    skip = resume['page']['skip']
+                    offset = resume['page']['offset']
+                    devicecount = resume['page']['count']
+                    #cut off anything written after the last recorded page before reading the devices back
+                    with open(filename, 'r+b') as file:
+                        file.truncate(offset)
+                    #rebuild the snapshot of the pages that are already written
+                    if self.snapshotfilename:
+                        for device in classInventory.read(filename):
+                            if device.get('id'):
+                                newsnapshot[device['id']] = {
+                                    "name": device['name'],
+                                    "lDiscoveryTime": device.get('lDiscoveryTime'),
+                                    "attributes": device.get('attributes', {}),
+                                }
+                    print (f'{Fore.YELLOW}Resuming inventory after {devicecount} devices{Fore.RESET}')
+            except Exception as e:
+                print (str(e))
+                return (str(e))
+        print (f'{Style.BRIGHT}Preparing Device and Module List...{Style.NORMAL}')
+
+        """
+        ===============================================================
+        THIS SECTION IS TO RETURN THE DEVICE ATTRIBUTES WITHOUT MODULES
+        ===============================================================
+    
+        This section will gather the device attributes without the modules.
+
+        Skip is the number of records to skip on the call, so after the first 50 are processed, skip must be increased 50. 
+        Count is the number of records.  Netbrain can only return 50 entries per page, so count is always 50.
+        This continues the loop while the page count is 50.  Skip will keep increasing and eventually count will be less than 50
+        when there are not many records remaining.
+
+        The next page is requested as soon as the current one comes back with a full 50 records, so it is
+        already in flight while the modules of the current page are being fetched.
+        """
+        #run api call to get list of devices
+        try:
+            with metrics.stage('inventory'), ThreadPoolExecutor(max_workers=1) as pagepool, \
+                    ThreadPoolExecutor(max_workers=max_workers) as modulepool, classInventory.writer(outputfilename, offset) as writer:
+                nextpage = pagepool.submit(self.get_device_page, skip, fields)
+                while count == 50:
+                    #time spent waiting for a page that is not back yet
+                    with metrics.stage('inventory_paging'):
+                        result = nextpage.result()
+                    #if HTTP code for devices is not 200
+                    if isinstance(result, str):
+                        return (result)
+                    #set the count as the number of results.  This will be at 50 until there are few records remaining
+                    count = len(result)
+                    #set the skip past this page, and the pages of the other shards, so Netbrain can display the next set
+                    skip = skip + count + 50 * (stride - 1)
+                    #start fetching the next page while the modules of this page are in flight
+                    if count == 50:
+                        nextpage = pagepool.submit(self.get_device_page, skip, fields)
+                    #devices that are not checked don't need their modules
+                    if devicefilter and devicefilter.checkdevices:
+                        kept = [device for device in result if devicefilter.keep_device(device)]
+                        filtered = filtered + len(result) - len(kept)
+                        result = kept
+                    #uncomment to create a shorter list for testing
+                    #if skip == 100:
+                    #    break
+
+                    """
+                    ===============================================================
+                    THIS SECTION IS TO RETURN THE DEVICE MODULE ATTRIBUTES
+                    ===============================================================
+
+                    This section will gather the device module attributes if they exist.  The serials and other module information 
+                    is retrieved by a separate api call with a parameter of hostname.  One call per device is run
+                    concurrently, up to max_workers at a time.  Devices whose last discovery time matches the snapshot
+                    reuse the module attributes of the snapshot instead.
+                    """
+                    pageList = []
+                    stale = []
+                    for device in result:
+                        previous = snapshot.get(device.get('id'))
+                        if previous and device.get('lDiscoveryTime') and previous['lDiscoveryTime'] == device['lDiscoveryTime']:
+                            if previous['attributes']:
+                                device['attributes'] = previous['attributes']
+                            pageList.append(device)
+                            reused = reused + 1
+                        else:
+                            stale.append(device)
+                    with metrics.stage('module_fetch'):
+                        modules = list(modulepool.map(self.get_device_modules, stale, [modulefields] * len(stale)))
+                    for device in modules:
+                        #if HTTP code for module attributes is not 200
+                        if isinstance(device, str):
+                            return (device)
+                        #append the results of device and module to the list
+                        pageList.append(device)
+
+                    for device in pageList:
+                        #save the module attributes of every device for the next incremental run
+                        if self.snapshotfilename and device.get('id'):
+                            newsnapshot[device['id']] = {
+                                "name": device['name'],
+                                "lDiscoveryTime": device.get('lDiscoveryTime'),
+                                "attributes": device.get('attributes', {}),
+                            }
+                        #write the page out as soon as it is complete, or keep it for the sorted json output
+                        if writer:
+                            writer.write(device)
+                        else:
+                            rawList.append(device)
+                    devicecount = devicecount + len(pageList)
+                    metrics.count('inventory_devices', len(pageList))
+                    #the page is on disk, a rerun can start from the next one
+                    if checkpoint and writer:
+                        checkpoint.record('inventory', 'page', {"skip": skip, "offset": writer.tell(), "count": devicecount,
+                            "filename": filename})
+                    if onpage:
+                        onpage(pageList)
+        except Exception as e:
+            print (str(e))
+            return (str(e))
+
+        metrics.count('modules_reused', reused)
+        metrics.count('inventory_filtered', filtered)
+        if devicefilter and devicefilter.checkdevices:
+            print (f'{Fore.CYAN}{filtered} devices left out by the filters{Fore.RESET}')
+        if incremental:
+            print (f'{Fore.CYAN}Modules reused for {reused} of {devicecount} devices not rediscovered since the last run{Fore.RESET}')
+        if self.snapshotfilename:
+            self.save_snapshot(newsnapshot)
+        if checkpoint and outputfilename:
+            checkpoint.record('inventory', 'done', {"count": devicecount, "filename": filename})
+
+        #the streamed file is left in page order.  classInventory.sort() puts it in name order if needed
+        if outputfilename:
+            return (devicecount)
+        #sort the list by device name
+        sortedList = sorted(rawList, key=lambda x: x['name'].lower())
+        #save the result as json output
+        result = json.dumps(sortedList, indent=4, sort_keys=False)
+        return (result)
+    
+    def put_eol_attributes(self, hostname, rows):
+        """
+        Uploads the EOL attributes of one device and its modules over the shared session.
+        Inputs:
+            - hostname
+            - rows - list of (moduleName, attributeValue).  A blank moduleName is the device itself
+        Outputs:
+            - result - list of error strings, empty if every attribute was set
+        """
+        errors = []
+        for moduleName, attributeValue in rows:
+            #set eol attribute name depending on if row is a device or module
+            if moduleName == '':
+                #define parameters for device attribute API call.
+                data = {
+                    "hostname": hostname,
+                    "attributeName": "deviceeol",
+                    "attributeValue": attributeValue
+                }
+                #set the url for device and attributes
+                url = self.server_url + "V1/CMDB/Devices/Attributes"
+            else:
+                #define parameters for module attribute API call.
+                data = {
+                    "hostname": hostname,
+                    "attributeName": "moduleeol",
+                    "attributeValue": attributeValue,
+                    "moduleName": moduleName
+                }
+                #set the url for module and attributes
+                url = self.server_url + "V1/CMDB/Modules/Attributes"
+
+            #make the API call
+            try:
+                resp = self.session.put(url,data=json.dumps(data),headers=self.headers, verify=True)
+                #check for HTTP codes other than 200
+                if resp.status_code != 200:
+                    errors.append("Setting Attribute Failed! -" + str(resp.text))
+            except Exception as e:
+                errors.append(str(e))
+        return (errors)
+
+    def get_current_eol(self, inventoryfilename):
+        """
+        Reads the EOL attribute values NetBrain already holds from the fetched inventory.
+        Inputs:
+            - inventoryfilename - json inventory written from get_all_devices_and_attributes()
+        Outputs:
+            - current - dictionary of (hostname, moduleName): value.  moduleName is blank for the device itself
+        """
+        current = {}
+        for i in classInventory.read(inventoryfilename):
+            current.update(self.get_device_eol(i))
+        return (current)
+
+    @staticmethod
+    def get_device_eol(device):
+        """
+        Reads the EOL attribute values NetBrain already holds for one device.
+        Inputs:
+            - device - device dictionary from get_all_devices_and_attributes()
+        Outputs:
+            - current - dictionary of (hostname, moduleName): value.  moduleName is blank for the device itself
+        """
+        current = {(device['name'], ''): str(device.get('deviceeol') or '')}
+        for x in device.get('attributes', {}).values():
+            current[(device['name'], x['name'])] = str(x.get('moduleeol') or '')
+        return (current)
+
+    def add_eol_attributes(self, max_workers=None, inventoryfilename=None, checkpoint=None, inventoryonly=False, snapshotfilenames=None,
+            domain=None):
+        """
+        Adds EOL attributes of devices and modules from eolreport.
+        Rows are grouped by hostname and the hostnames are uploaded concurrently.
+        If the inventory is given, only values that differ from what NetBrain already holds are uploaded.
+        Inputs:
+            - headers
+            - max_workers - number of hostnames uploaded at the same time (defaults to NETBRAIN_MAX_WORKERS)
+            - inventoryfilename - json inventory written from get_all_devices_and_attributes()
+            - checkpoint - classCheckpoint recording each uploaded hostname, so a rerun skips them
+            - inventoryonly - skip hostnames that are not in the inventory, used when the report covers several domains
+            - snapshotfilenames - snapshots to keep in step with the upload (defaults to snapshotfilename).  The
+              inventory of a sharded run is fetched with one snapshot per shard
+            - domain - tenant:domain whose rows are uploaded when the report has a domain column
+        Outputs:
+            - result - number of attribute uploads that failed
+        """
+        #set parameters necessary for api call (Netbrain API defined)
+        eolreport = self.eolreportfilename
+        if max_workers is None:
+            max_workers = self.max_workers
+        #convert the report to a pandas dataframe. blank module names stay blank strings
+        df = classReport.read(eolreport)
+        #a report of several domains can hold the same hostname more than once, only the rows of this domain are its own
+        if domain is not None and 'domain' in df:
+            df = df[df['domain'] == domain]
+        #the attribute values NetBrain holds today
+        current = self.get_current_eol(inventoryfilename) if inventoryfilename else None
+        #hostnames an interrupted run already uploaded
+        finished = checkpoint.completed('upload') if checkpoint else {}
+
+        print (f'{Style.BRIGHT}Preparing Netbrain Upload of Device and Module End-of-Life Attribute...{Style.NORMAL}')
+        #group the rows of each hostname so one worker sets the device and all its modules
+        hostnames = {}
+        added = changed = unchanged = 0
+        for hostname, moduleName, attributeValue in df[['hostname', 'modulename', 'EOLDate']].itertuples(index=False, name=None):
+            if hostname in finished:
+                continue
+            if inventoryonly and (hostname, '') not in current:
+                continue
+            if current is not None:
+                value = current.get((hostname, moduleName), '')
+                #skip values NetBrain already has
+                if value == attributeValue:
+                    unchanged = unchanged + 1
+                    continue
+                elif value == '':
+                    added = added + 1
+                else:
+                    changed = changed + 1
+            hostnames.setdefault(hostname, []).append((moduleName, attributeValue))
+        uploads = sum(len(rows) for rows in hostnames.values())
+        if current is not None:
+            print (f'{Fore.CYAN}EOL attributes: {added} added, {changed} changed, {unchanged} unchanged{Fore.RESET}')
+
+        metrics = self.session.metrics
+        metrics.count('eol_added', added)
+        metrics.count('eol_changed', changed)
+        metrics.count('eol_unchanged', unchanged)
+
+        failed = 0
+        uploaded = []
+        #NetBrain sets one attribute per call, so the calls of different hostnames are run concurrently
+        with metrics.stage('upload'), ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for hostname, errors in zip(hostnames, pool.map(self.put_eol_attributes, hostnames.keys(), hostnames.values())):
+                for error in errors:
+                    print (error)
+                failed = failed + len(errors)
+                if not errors:
+                    if checkpoint:
+                        checkpoint.record('upload', hostname)
+                    uploaded.extend((hostname, moduleName, attributeValue) for moduleName, attributeValue in hostnames[hostname])
+        #keep the module values of the snapshot in step with NetBrain
+        if snapshotfilenames is None:
+            snapshotfilenames = [self.snapshotfilename] if self.snapshotfilename else []
+        for snapshotfilename in snapshotfilenames:
+            self.update_snapshot(uploaded, snapshotfilename)
+        metrics.count('eol_uploaded', uploads - failed)
+        metrics.count('eol_upload_failures', failed)
+        print (f'{Fore.CYAN}Uploaded {uploads - failed} of {uploads} EOL attributes for {len(hostnames)} devices{Fore.RESET}')
+        return (failed)
@@ -0,0 +1,295 @@
+import queue,threading
+from concurrent.futures import ThreadPoolExecutor
+from .ciscosupport import classCiscoSupport
+from .config import classSetting
+from .console import Fore,Style
+from .filters import classFilter
+from .inventory import classInventory
+from .metrics import classMetrics
+from .netbrain import classNetbrain
+
+class classPipeline():
+    """
+    This class runs the inventory, the EOX lookup and the upload at the same time instead of one after the other.
+    Every device page goes through a bounded queue to the EOX lookup as soon as its modules are in, and every device
+    whose serials are all answered goes through a second bounded queue to the upload, so a run takes about as long
+    as its slowest stage instead of the sum of all three.  A stage that runs ahead is held back by the full queue.
+    The pipeline does not resume from the checkpoint, a rerun after a failure relies on the EOX cache instead.
+    """
+
+    #run the pipeline instead of the stages one after the other
+    enabled = classSetting('CISCOEOL_PIPELINE', False, classSetting.flag)
+    #device pages waiting for the EOX lookup.  Devices waiting for the upload are limited to this many per worker
+    queue_size = classSetting('CISCOEOL_PIPELINE_QUEUE', 8, int)
+
+    def __init__(self, inventoryfilename):
+        """
+        Inputs:
+            - inventoryfilename - JSON Lines inventory written while the pages arrive
+        """
+        self.inventoryfilename = inventoryfilename
+        self.netbrain = classNetbrain()
+        self.cisco = classCiscoSupport()
+        self.metrics = classMetrics.current()
+        self.pages = queue.Queue(maxsize=self.queue_size)
+        self.uploads = queue.Queue(maxsize=self.queue_size * self.netbrain.max_workers)
+        self.tokenheaders = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            }
+        #everything below is shared by the stages and guarded by the lock
+        self.lock = threading.Lock()
+        #normalized serial: [(hostname, modulename, domain), ...] of every device seen so far
+        self.owners = {}
+        #normalized serial: (status, eoldate) of every answered serial
+        self.outcomes = {}
+        #serials already sent to the cache or the API
+        self.requested = set()
+        #serial: hostnames waiting for its answer
+        self.waiting = {}
+        #hostname: {"rows": [(serial, modulename), ...], "current": EOL values NetBrain holds, "pending": unanswered serials}
+        self.devices = {}
+        self.errors = []
+        self.added = self.changed = self.unchanged = 0
+        self.failed = 0
+        self.uploads_total = 0
+        self.uploaded = []
+
+    def run(self):
+        """
+        Runs the three stages and writes the report once every serial is answered.
+        Outputs:
+            - result - error string if a stage failed
+        """
+        print (f'{Style.BRIGHT}Running inventory, EOL lookup and upload as a pipeline...{Style.NORMAL}')
+        token = self.netbrain.get_token()
+        try:
+            #a failed login of either API ends the run before any page is fetched
+            if self.netbrain.tokenmanager.token is None:
+                return (token)
+            if self.cisco.tokenmanager.token is None:
+                return (self.cisco.token)
+            with self.metrics.stage('pipeline'):
+                uploaders = [threading.Thread(target=self.upload_devices, daemon=True) for i in range(self.netbrain.max_workers)]
+                lookup = threading.Thread(target=self.lookup_pages, daemon=True)
+                for thread in uploaders + [lookup]:
+                    thread.start()
+                #page through NetBrain on this thread, handing every page to the lookup
+                try:
+                    result = self.netbrain.get_all_devices_and_attributes(outputfilename=self.inventoryfilename,
+                        fields=classNetbrain.eol_fields, modulefields=classNetbrain.eol_module_fields, onpage=self.pages.put,
+                        devicefilter=classFilter())
+                finally:
+                    self.pages.put(None)
+                if isinstance(result, str):
+                    self.errors.append(result)
+                lookup.join()
+                for thread in uploaders:
+                    self.uploads.put(None)
+                for thread in uploaders:
+                    thread.join()
+            if self.errors:
+                return (self.errors[0])
+            self.write_report()
+        finally:
+            self.netbrain.logout()
+            if self.cisco.cache:
+                self.cisco.cache.close()
+
+        #keep the module values of the snapshot in step with NetBrain
+        if self.netbrain.snapshotfilename:
+            self.netbrain.update_snapshot(self.uploaded)
+        #put the inventory in device name order, the same as fetch-inventory leaves it
+        with self.metrics.stage('inventory_sort'):
+            classInventory.sort(self.inventoryfilename)
+        for name, value in (('eol_added', self.added), ('eol_changed', self.changed), ('eol_unchanged', self.unchanged),
+                ('eol_uploaded', self.uploads_total - self.failed), ('eol_upload_failures', self.failed)):
+            self.metrics.count(name, value)
+        print (f'{Fore.CYAN}EOL attributes: {self.added} added, {self.changed} changed, {self.unchanged} unchanged{Fore.RESET}')
+        print (f'{Fore.CYAN}Uploaded {self.uploads_total - self.failed} of {self.uploads_total} EOL attributes{Fore.RESET}')
+        if self.failed:
+            return (f'{self.failed} EOL attribute uploads failed')
+
+    def lookup_pages(self):
+        """
+        Turns the serials of every device page into EOX batches.  Runs on its own thread until the last page.
+        """
+        planner = self.cisco.get_batch_planner()
+        with ThreadPoolExecutor(max_workers=self.cisco.max_workers) as pool:
+            #batches in flight or waiting for a worker.  Beyond this the lookup stops taking pages
+            inflight = threading.BoundedSemaphore(self.cisco.max_workers * 2)
+            for page in iter(self.pages.get, None):
+                #after a failure the pages are still taken so the paging is not blocked
+                if self.errors:
+                    continue
+                try:
+                    for batch in map(planner.add, self.add_page(page)):
+                        if batch:
+                            self.submit(pool, inflight, batch)
+                except Exception as e:
+                    self.errors.append(str(e))
+            #the last serials don't fill a whole batch
+            batch = planner.flush()
+            if batch and not self.errors:
+                self.submit(pool, inflight, batch)
+
+    def add_page(self, page):
+        """
+        Registers the serials of a device page.  Devices whose serials are all answered already go to the upload.
+        Inputs:
+            - page - list of device dictionaries
+        Outputs:
+            - serials that need to be sent to the API
+        """
+        rows = {}
+        pids = {}
+        for serial, hostname, modulename, pid, domain in self.cisco.iter_serials(self.cisco.filter.apply(page)):
+            rows.setdefault(hostname, []).append((serial, modulename))
+            pids.setdefault(serial, set()).add(pid)
+
+        new = []
+        ready = []
+        with self.lock:
+            for device in page:
+                hostname = device['name']
+                entry = {"rows": rows.get(hostname, []), "current": classNetbrain.get_device_eol(device), "pending": set()}
+                self.devices[hostname] = entry
+                for serial, modulename in entry["rows"]:
+                    self.owners.setdefault(serial, []).append((hostname, modulename, device.get('domain', "")))
+                    if serial in self.outcomes:
+                        continue
+                    entry["pending"].add(serial)
+                    self.waiting.setdefault(serial, set()).add(hostname)
+                    if serial not in self.requested:
+                        self.requested.add(serial)
+                        new.append(serial)
+                if not entry["pending"]:
+                    ready.append(hostname)
+        self.queue_uploads(ready)
+
+        #serials answered by the EOX dates of their product ID are not looked up one by one
+        if self.cisco.pid_lookup and new:
+            answers = self.cisco.resolve_by_pid({i: pids[i] for i in new}, self.tokenheaders)
+            if isinstance(answers, str):
+                print (answers)
+                self.errors.append(answers)
+                return ([])
+            self.queue_uploads(self.resolve(answers))
+            new = [i for i in new if i not in answers]
+
+        #serials answered by the cache don't need to be sent to the API
+        if self.cisco.cache and new:
+            hits = self.cisco.cache.get_many(new)
+            self.metrics.count('eox_cache_hits', len(hits))
+            self.queue_uploads(self.resolve(hits))
+            new = [i for i in new if i not in hits]
+        return (new)
+
+    def submit(self, pool, inflight, serials):
+        inflight.acquire()
+        future = pool.submit(self.lookup_batch, serials)
+        future.add_done_callback(lambda future: inflight.release())
+        self.metrics.count('eox_batches')
+        self.metrics.count('eox_cache_misses', len(serials))
+
+    def lookup_batch(self, serials):
+        """
+        Looks up one batch of serials and passes the devices it completes on to the upload.  Runs in the EOX pool.
+        """
+        try:
+            result = self.cisco.get_eox_records(serials, self.tokenheaders)
+            if isinstance(result, str):
+                print (result)
+                self.errors.append(result)
+                return
+            parsed = self.cisco.parse_eox_records(result).drop_duplicates(subset='serial')
+            answers = {i: (status, eoldate) for i, status, eoldate in parsed.itertuples(index=False, name=None) if i in serials}
+            #remember the fresh answers for the next run
+            if self.cisco.cache:
+                self.cisco.cache.put_many(answers)
+            #a serial the API did not answer for or rejected is left off the report, the same as one that was not found
+            self.queue_uploads(self.resolve({i: answers.get(i, ("notfound", "")) for i in serials}))
+        except Exception as e:
+            self.errors.append(str(e))
+
+    def resolve(self, answers):
+        """
+        Stores answers and finds the devices that no longer wait for any serial.
+        Inputs:
+            - answers - dictionary of serial: (status, eoldate)
+        Outputs:
+            - hostnames ready to upload
+        """
+        ready = []
+        with self.lock:
+            for serial, outcome in answers.items():
+                self.outcomes[serial] = outcome
+                for hostname in self.waiting.pop(serial, ()):
+                    pending = self.devices[hostname]["pending"]
+                    pending.discard(serial)
+                    if not pending:
+                        ready.append(hostname)
+        return (ready)
+
+    def queue_uploads(self, hostnames):
+        """
+        Passes the EOL values of complete devices that differ from what NetBrain holds to the upload.
+        """
+        for hostname in hostnames:
+            with self.lock:
+                entry = self.devices.pop(hostname)
+                rows = []
+                for serial, modulename in entry["rows"]:
+                    status, eoldate = self.outcomes[serial]
+                    #serials that were not found or are invalid are not uploaded
+                    if status == "notfound":
+                        continue
+                    value = entry["current"].get((hostname, modulename), '')
+                    #skip values NetBrain already has
+                    if value == eoldate:
+                        self.unchanged = self.unchanged + 1
+                        continue
+                    elif value == '':
+                        self.added = self.added + 1
+                    else:
+                        self.changed = self.changed + 1
+                    rows.append((modulename, eoldate))
+            if rows:
+                self.uploads.put((hostname, rows))
+
+    def upload_devices(self):
+        """
+        Uploads the EOL values of one device at a time.  Runs on max_workers threads until the last device.
+        """
+        for hostname, rows in iter(self.uploads.get, None):
+            try:
+                errors = self.netbrain.put_eol_attributes(hostname, rows)
+            except Exception as e:
+                errors = [str(e)] * len(rows)
+            for error in errors:
+                print (error)
+            with self.lock:
+                self.uploads_total = self.uploads_total + len(rows)
+                self.failed = self.failed + len(errors)
+                if not errors:
+                    self.uploaded.extend((hostname, moduleName, attributeValue) for moduleName, attributeValue in rows)
+
+    def write_report(self):
+        """
+        Writes the report of every answered serial, the same report get_eol() writes.
+        """
+        import pandas as pd
+        with self.metrics.stage('report_write'):
+            outcomes = pd.DataFrame([(i, status, eoldate) for i, (status, eoldate) in self.outcomes.items()],
+                columns=['serial', 'status', 'eoldate'])
+            report = self.cisco.get_report(self.owners, outcomes)
+            for status, value in outcomes['status'].value_counts().items():
+                self.metrics.count('eox_' + status, int(value))
+            self.metrics.count('eox_unique_serials', len(self.owners))
+            self.metrics.count('report_rows', len(report.index))
+            if self.cisco.verbose:
+                print (f'{Fore.CYAN}{report}{Fore.RESET}')
+            else:
+                print (f'{Fore.CYAN}{len(report.index)} report rows for {len(self.owners)} unique serials{Fore.RESET}')
+            self.cisco.write_report(report)
+        self.cisco.write_quarantine()
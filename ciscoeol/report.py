@@ -0,0 +1,89 @@
+import os
+
+class classReport():
+    """
+    This class writes and reads the EOL report.
+    The report is csv, or parquet when the filename ends in .parquet.  Parquet keeps hostname and modulename as
+    categorical columns and EOLDate as a real date, with "Not Announced" stored as a null date plus the
+    NotAnnounced flag, which makes the report much smaller and faster to read back.  Parquet needs pyarrow.
+    """
+
+    @staticmethod
+    def is_parquet(filename):
+        return (str(filename).lower().endswith(".parquet"))
+
+    @staticmethod
+    def write(report, filename, csvfilename=None):
+        """
+        Writes the whole report in one step.  The report is written to a temporary file and moved into place,
+        so a rerun replaces it instead of appending duplicate rows and a crash never leaves half a report.
+        Inputs:
+            - report - dictionary of the hostname, modulename, deviceserial and EOLDate columns.  A domain column
+              is kept too, a sharded run covers several domains that can hold the same hostnames
+            - filename - csv or parquet report
+            - csvfilename - optional csv export written next to a parquet report
+        """
+        #pandas is only imported by the stages that use it, so importing the package stays fast
+        import pandas as pd
+        columns = ['hostname', 'modulename', 'deviceserial', 'EOLDate']
+        if 'domain' in report:
+            columns.append('domain')
+        df = pd.DataFrame(report, columns=columns)
+        #sort by hostname, keeping the order of the rows of each hostname
+        df = df.sort_values(by='hostname', kind='stable').reset_index(drop=True)
+        tmpfilename = filename + ".tmp"
+        if classReport.is_parquet(filename):
+            classReport.to_parquet(df, tmpfilename)
+        else:
+            df.to_csv(tmpfilename, mode='w', index=False, header=True)
+        os.replace(tmpfilename, filename)
+        if csvfilename:
+            df.to_csv(csvfilename + ".tmp", mode='w', index=False, header=True)
+            os.replace(csvfilename + ".tmp", csvfilename)
+
+    @staticmethod
+    def to_parquet(df, filename):
+        """
+        Writes the report with compact dtypes.
+        """
+        import pandas as pd
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("A .parquet report needs pyarrow, run: pip install pyarrow")
+        out = pd.DataFrame({
+            'hostname': df['hostname'].astype('category'),
+            'modulename': df['modulename'].astype('category'),
+            'deviceserial': df['deviceserial'].astype('string'),
+            'EOLDate': pd.to_datetime(df['EOLDate'], format='%Y-%m-%d', errors='coerce').dt.date,
+            'NotAnnounced': df['EOLDate'] == "Not Announced",
+        })
+        if 'domain' in df:
+            out['domain'] = df['domain'].astype('category')
+        out.to_parquet(filename, engine='pyarrow', index=False)
+
+    @staticmethod
+    def read(filename):
+        """
+        Reads a csv or parquet report back.
+        Inputs:
+            - filename
+        Outputs:
+            - dataframe of strings with the hostname, modulename, deviceserial and EOLDate columns, where EOLDate
+              is either YYYY-MM-DD or "Not Announced" as written by get_eol(), and the domain column if it was written
+        """
+        import pandas as pd
+        if not classReport.is_parquet(filename):
+            return (pd.read_csv(filename, dtype=str, keep_default_na=False))
+        df = pd.read_parquet(filename, engine='pyarrow')
+        eoldate = pd.to_datetime(df['EOLDate']).dt.strftime('%Y-%m-%d').fillna("")
+        eoldate = eoldate.mask(df['NotAnnounced'], "Not Announced")
+        result = pd.DataFrame({
+            'hostname': df['hostname'].astype(str),
+            'modulename': df['modulename'].astype(str),
+            'deviceserial': df['deviceserial'].astype(str),
+            'EOLDate': eoldate,
+        })
+        if 'domain' in df:
+            result['domain'] = df['domain'].astype(str)
+        return (result)
@@ -0,0 +1,182 @@
+import os,shutil
+from concurrent.futures import ProcessPoolExecutor
+from .checkpoint import classCheckpoint
+from .ciscosupport import classCiscoSupport
+from .config import classSetting
+from .console import Fore,Style
+from .filters import classFilter
+from .inventory import classInventory
+from .metrics import classMetrics
+from .netbrain import classNetbrain
+
+class classShardedRun():
+    """
+    This class runs the EOL check across several NetBrain domains and processes.
+    The inventory of every domain is split into page shards that are fetched by a process pool, each process with
+    its own session and token.  The shards are merged into one inventory for a single EOX lookup and report,
+    and the report is then uploaded to every domain in parallel.
+    """
+
+    #tenant:domain pairs, comma separated.  Defaults to NETBRAIN_TENANT and NETBRAIN_DOMAIN
+    domains = classSetting('NETBRAIN_DOMAINS')
+    #page shards per domain and processes used to fetch them
+    shards = classSetting('NETBRAIN_SHARDS', 1, int)
+    processes = classSetting('NETBRAIN_PROCESSES', os.cpu_count() or 1, int)
+
+    def __init__(self, inventoryfilename, checkpoint=None):
+        """
+        Inputs:
+            - inventoryfilename - merged JSON Lines inventory.  Shard and domain files are written next to it
+            - checkpoint - classCheckpoint of the run.  Every shard keeps its own journal next to it
+        """
+        self.inventoryfilename = os.path.expanduser(inventoryfilename)
+        self.checkpoint = checkpoint
+        self.domainlist = self.get_domains()
+
+    @classmethod
+    def enabled(cls):
+        """
+        Outputs:
+            - True if several domains or shards are configured
+        """
+        return (bool(cls.domains) or cls.shards > 1)
+
+    def get_domains(self):
+        """
+        Outputs:
+            - list of (tenant, domain)
+        """
+        if not self.domains:
+            return ([(classNetbrain.tenant, classNetbrain.domain)])
+        return ([tuple(pair.strip().split(":", 1)) for pair in self.domains.split(",") if pair.strip()])
+
+    def get_filename(self, filename, *parts):
+        """
+        Builds a per domain or per shard filename next to filename.
+        """
+        if not filename:
+            return (filename)
+        root, ext = os.path.splitext(filename)
+        return (root + "." + ".".join(str(part) for part in parts) + ext)
+
+    @staticmethod
+    def fetch_shard(tenant, domain, start, stride, outputfilename, snapshotfilename, checkpointfilename):
+        """
+        Fetches one page shard of one domain.  Runs in a worker process.
+        Outputs:
+            - (outputfilename, number of devices or an error string, metrics of the shard)
+        """
+        metrics = classMetrics.reset()
+        netbrain = classNetbrain(tenant, domain, snapshotfilename)
+        checkpoint = classCheckpoint(checkpointfilename) if checkpointfilename else None
+        result = netbrain.get_all_devices_and_attributes(outputfilename=outputfilename,
+            fields=classNetbrain.eol_fields, modulefields=classNetbrain.eol_module_fields,
+            checkpoint=checkpoint, start=start, stride=stride, devicefilter=classFilter())
+        netbrain.logout()
+        return ((outputfilename, result, metrics.export()))
+
+    @staticmethod
+    def upload_domain(tenant, domain, inventoryfilename, checkpointfilename, snapshotfilenames):
+        """
+        Uploads the report rows of the hostnames of one domain and writes the uploaded module values back to the
+        snapshots of its shards, so the next incremental run doesn't upload them again.  Runs in a worker process.
+        Outputs:
+            - (number of attribute uploads that failed, metrics of the upload)
+        """
+        metrics = classMetrics.reset()
+        netbrain = classNetbrain(tenant, domain)
+        checkpoint = classCheckpoint(checkpointfilename) if checkpointfilename else None
+        result = netbrain.add_eol_attributes(inventoryfilename=inventoryfilename, checkpoint=checkpoint, inventoryonly=True,
+            snapshotfilenames=snapshotfilenames, domain=tenant + ":" + domain)
+        netbrain.logout()
+        return ((result, metrics.export()))
+
+    def merge(self, filenames, outputfilename, domain=None):
+        """
+        Concatenates JSON Lines inventories and sorts the result by device name.
+        Inputs:
+            - domain - tenant:domain every device is tagged with, so the report can tell hostnames of different
+              domains apart
+        """
+        if domain is None:
+            with open(outputfilename, 'wb') as out:
+                for filename in filenames:
+                    with open(filename, 'rb') as file:
+                        shutil.copyfileobj(file, out)
+        else:
+            with classInventory.writer(outputfilename) as writer:
+                for filename in filenames:
+                    for device in classInventory.read(filename):
+                        device['domain'] = domain
+                        writer.write(device)
+        classInventory.sort(outputfilename)
+
+    def run(self):
+        """
+        Runs inventory, EOX lookup and upload for every domain.
+        Outputs:
+            - result - error string if a stage failed
+        """
+        checkpointfilename = self.checkpoint.filename if self.checkpoint else None
+        metrics = classMetrics.current()
+        print (f'{Style.BRIGHT}Fetching {len(self.domainlist)} domains in {self.shards} shards each on {self.processes} processes...{Style.NORMAL}')
+
+        #fetch every shard of every domain in the process pool
+        jobs = []
+        for tenant, domain in self.domainlist:
+            for start in range(self.shards):
+                parts = (tenant, domain, start)
+                jobs.append((tenant, domain, start, self.shards,
+                    self.get_filename(self.inventoryfilename, *parts),
+                    self.get_filename(classNetbrain.snapshotfilename, *parts),
+                    self.get_filename(checkpointfilename, *parts)))
+        with metrics.stage('shard_fetch'), ProcessPoolExecutor(max_workers=self.processes) as pool:
+            results = list(pool.map(self.fetch_shard, *zip(*jobs)))
+        #the stages of the shards overlap, so their durations add up to more than shard_fetch
+        for outputfilename, result, shardmetrics in results:
+            metrics.merge(shardmetrics)
+        for outputfilename, result, shardmetrics in results:
+            if isinstance(result, str):
+                return (result)
+
+        #merge the shards of every domain, then every domain into the inventory used for the EOX lookup
+        domainfiles = []
+        with metrics.stage('inventory_merge'):
+            for tenant, domain in self.domainlist:
+                domainfile = self.get_filename(self.inventoryfilename, tenant, domain)
+                self.merge([job[4] for job in jobs if job[:2] == (tenant, domain)], domainfile, tenant + ":" + domain)
+                domainfiles.append(domainfile)
+            self.merge(domainfiles, self.inventoryfilename)
+
+        #one lookup for all domains keeps the Cisco API quota in a single rate limiter
+        cisco = classCiscoSupport()
+        result = cisco.get_eol(self.inventoryfilename, checkpoint=self.checkpoint)
+        if isinstance(result, str):
+            return (result)
+
+        #upload the report to every domain in parallel
+        failed = 0
+        with metrics.stage('domain_upload'), ProcessPoolExecutor(max_workers=self.processes) as pool:
+            for result, domainmetrics in pool.map(self.upload_domain,
+                    [tenant for tenant, domain in self.domainlist],
+                    [domain for tenant, domain in self.domainlist],
+                    domainfiles,
+                    [self.get_filename(checkpointfilename, tenant, domain) for tenant, domain in self.domainlist],
+                    [[job[5] for job in jobs if job[:2] == (tenant, domain) and job[5]] for tenant, domain in self.domainlist]):
+                failed = failed + result
+                metrics.merge(domainmetrics)
+        print (f'{Fore.CYAN}{failed} EOL attribute uploads failed across {len(self.domainlist)} domains{Fore.RESET}')
+        #the shard files and journals are kept, so a rerun only uploads what failed
+        if failed:
+            return (f'{failed} EOL attribute uploads failed')
+
+        #remove the shard files and journals, the merged and per domain inventories are kept
+        for job in jobs:
+            os.remove(job[4])
+            for filename in job[6:]:
+                if filename and os.path.isfile(filename):
+                    os.remove(filename)
+        for tenant, domain in self.domainlist:
+            filename = self.get_filename(checkpointfilename, tenant, domain)
+            if filename and os.path.isfile(filename):
+                os.remove(filename)
@@ -0,0 +1,243 @@
+import threading,time
+from .config import classSetting
+from .metrics import classMetrics
+
+class classTransport():
+    """
+    This class is the shared HTTP transport for the NetBrain and Cisco Support RestAPI classes.
+    It keeps a pool of keep-alive connections and retries transient failures with exponential backoff.
+    """
+
+    #set retry behaviour from environment variable file
+    retries = classSetting('HTTP_RETRIES', 5, int)
+    backoff = classSetting('HTTP_BACKOFF', 0.5, float)
+    #HTTP codes that are retried. 429 honors the Retry-After header
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size=10, retry_statuses=None, token=None, header="Token", prefix=""):
+        """
+        Creates a requests session with a connection pool and retry policy.
+        Inputs:
+            - pool_size - number of keep-alive connections per host, match it to the concurrency level
+            - retry_statuses - HTTP codes to retry (defaults to retry_statuses)
+            - token - optional classToken.  Its current token is added to every call and a 401 is answered by
+              re-authenticating and replaying the call once
+            - header - header that carries the token
+            - prefix - text placed before the token in the header, for example "Bearer "
+        Outputs:
+            - session
+        """
+        if retry_statuses is None:
+            retry_statuses = self.retry_statuses
+        self.session = self.get_session(pool_size, retry_statuses)
+        self.metrics = classMetrics.current()
+        self.token = token
+        self.header = header
+        self.prefix = prefix
+
+    def get_session(self, pool_size, retry_statuses):
+        """
+        Builds the pooled requests session.
+        Inputs:
+            - pool_size
+            - retry_statuses
+        Outputs:
+            - session
+        """
+        #requests is only imported once a client is created, so importing the package stays fast
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        #retry connection errors, resets and the listed status codes on every method.
+        #all calls made by this project are safe to replay
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=retry_statuses,
+            allowed_methods=None,
+            #urllib3 retries any response carrying Retry-After, so only honor it when 429 is retried here
+            respect_retry_after_header=429 in retry_statuses,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return (session)
+
+    def request(self, method, url, auth=True, **kwargs):
+        """
+        Runs one call on the pooled session.
+        Inputs:
+            - method
+            - url
+            - auth - add the token of the token manager.  Calls that fetch the token itself pass False
+        Outputs:
+            - resp
+        """
+        if not (auth and self.token):
+            return (self.send(method, url, **kwargs))
+        headers = dict(kwargs.pop('headers', None) or {})
+        token = self.token.get()
+        headers[self.header] = self.prefix + token
+        resp = self.send(method, url, headers=headers, **kwargs)
+        #the token expired or was revoked, get a new one and replay the call
+        if resp.status_code == 401:
+            self.metrics.count('token_replays')
+            headers[self.header] = self.prefix + self.token.refresh(stale=token)
+            resp = self.send(method, url, headers=headers, **kwargs)
+        return (resp)
+
+    def send(self, method, url, **kwargs):
+        """
+        Sends one call on the session and records its latency, status, retries and size in the metrics.
+        """
+        data = kwargs.get('data')
+        sent = len(data) if isinstance(data, (str, bytes)) else 0
+        start = time.perf_counter()
+        try:
+            resp = self.session.request(method, url, **kwargs)
+        except Exception:
+            self.metrics.record_request(method, url, time.perf_counter() - start, "error", sent=sent)
+            raise
+        #the retries urllib3 did before this response came back
+        retries = getattr(resp.raw, 'retries', None)
+        self.metrics.record_request(method, url, time.perf_counter() - start, resp.status_code,
+            retries=len(retries.history) if retries else 0, sent=sent, received=len(resp.content))
+        return (resp)
+
+    def get(self, url, **kwargs):
+        return (self.request("GET", url, **kwargs))
+
+    def post(self, url, **kwargs):
+        return (self.request("POST", url, **kwargs))
+
+    def put(self, url, **kwargs):
+        return (self.request("PUT", url, **kwargs))
+
+    def delete(self, url, **kwargs):
+        return (self.request("DELETE", url, **kwargs))
+
+class classRateLimiter():
+    """
+    This class is a thread safe token bucket used to stay within the request quotas of an API.
+    It limits calls per second, optionally counts calls per day, and can be paused when the API answers 429.
+    """
+
+    def __init__(self, rate_per_second, per_day=0, burst=None):
+        """
+        Inputs:
+            - rate_per_second - sustained calls per second
+            - per_day - maximum calls per day, 0 for no daily limit
+            - burst - calls allowed back to back (defaults to rate_per_second)
+        """
+        self.rate = float(rate_per_second)
+        self.capacity = float(burst or max(1, rate_per_second))
+        self.per_day = int(per_day)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.resume = 0.0
+        self.daycount = 0
+        self.daystart = time.time()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a call may be made.
+        Outputs:
+            - True, or False if the daily quota is used up
+        """
+        while True:
+            with self.lock:
+                #reset the daily counter every 24 hours
+                if time.time() - self.daystart >= 86400:
+                    self.daystart = time.time()
+                    self.daycount = 0
+                if self.per_day and self.daycount >= self.per_day:
+                    return (False)
+                now = time.monotonic()
+                #refill the bucket for the time that has passed
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.resume and self.tokens >= 1:
+                    self.tokens = self.tokens - 1
+                    self.daycount = self.daycount + 1
+                    return (True)
+                wait = max(self.resume - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Holds back every caller for the given number of seconds, used for 429 Retry-After.
+        Inputs:
+            - seconds
+        """
+        with self.lock:
+            self.resume = max(self.resume, time.monotonic() + seconds)
+            self.tokens = 0
+
+class classToken():
+    """
+    This class keeps an API token valid for a whole run and is shared by every worker thread.
+    The token is refreshed shortly before it expires, and after a 401 only the first worker re-authenticates
+    while the others wait for and reuse its new token.
+    """
+
+    #seconds before expiry at which the token is refreshed
+    margin = classSetting('TOKEN_REFRESH_MARGIN', 60.0, float)
+
+    def __init__(self, login):
+        """
+        Inputs:
+            - login - function returning (token, lifetime in seconds or None if unknown), or an error string
+        """
+        self.login = login
+        self.token = None
+        #time at which the token is refreshed, None if its lifetime is unknown
+        self.refreshat = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        """
+        Outputs:
+            - a token that is not about to expire
+        """
+        with self.lock:
+            if self.token is None or (self.refreshat is not None and time.monotonic() >= self.refreshat):
+                self.fetch()
+            return (self.token)
+
+    def refresh(self, stale=None):
+        """
+        Gets a new token.
+        Inputs:
+            - stale - the token that was rejected.  If another worker already replaced it, its new token is reused
+        Outputs:
+            - token
+        """
+        with self.lock:
+            if stale is None or self.token is None or self.token == stale:
+                self.fetch()
+            return (self.token)
+
+    def invalidate(self):
+        with self.lock:
+            self.token = None
+            self.refreshat = None
+
+    def fetch(self):
+        #called with the lock held
+        classMetrics.current().count('token_fetches')
+        result = self.login()
+        if isinstance(result, str):
+            raise RuntimeError(result)
+        self.token, lifetime = result
+        if lifetime:
+            #a token that lives no longer than the margin is used for half its lifetime instead of being renewed on every call
+            margin = min(self.margin, float(lifetime) / 2)
+            self.refreshat = time.monotonic() + float(lifetime) - margin
+        else:
+            self.refreshat = None